@@ -0,0 +1,210 @@
+"""
+Admission control for MediMate.
+Turns excess load away quickly with 429 Too Many Requests and a Retry-After
+hint, instead of letting it pile up on worker threads and Heygen quota:
+
+- RateLimiter gives every client a token bucket per route
+- ConcurrencyLimiter caps requests waiting on Heygen, with a short bounded
+  queue in front (AsyncConcurrencyLimiter is the asyncio version)
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+
+
+class AdmissionRejected(Exception):
+    """A request was shed; retry_after is a hint in seconds."""
+
+    def __init__(self, message, reason, retry_after):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Per-client token buckets: burst requests at once, refilled at rate per second.
+
+    Buckets for the least recently seen clients are dropped past max_clients,
+    which only ever gives those clients a fresh burst. A rate of 0 admits
+    everything.
+    """
+
+    def __init__(self, rate, burst, max_clients=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        self.clock = clock
+        self._buckets = OrderedDict()  # client -> (tokens, updated)
+        self._admitted = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, client):
+        """Take one token from client's bucket, or raise AdmissionRejected."""
+        if self.rate <= 0:
+            return
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.pop(client, None)
+            if bucket is None:
+                tokens = self.burst
+                if len(self._buckets) >= self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            if tokens < 1:
+                self._buckets[client] = (tokens, now)
+                self._rejected += 1
+                raise AdmissionRejected("Too many requests; slow down", 'rate_limited', (1 - tokens) / self.rate)
+            self._buckets[client] = (tokens - 1, now)
+            self._admitted += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'clients': len(self._buckets),
+                'admitted': self._admitted,
+                'rate_limited': self._rejected,
+            }
+
+
+class _BaseConcurrencyLimiter:
+    """Limits, queue bookkeeping and counters shared by both limiters.
+
+    At most limit requests run at once; up to queue_size more wait for a
+    slot, each for at most queue_timeout seconds. Anything beyond that is
+    rejected at once. A limit of 0 admits everything.
+    """
+
+    def __init__(self, limit, queue_size=0, queue_timeout=1.0, retry_after=1.0):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._in_flight = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._queued = 0
+        self._queue_full = 0
+        self._queue_timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def stats(self):
+        return {
+            'limit': self.limit,
+            'queue_size': self.queue_size,
+            'in_flight': self._in_flight,
+            'waiting': self._waiting,
+            'admitted': self._admitted,
+            'queued': self._queued,
+            'shed_queue_full': self._queue_full,
+            'shed_queue_timeout': self._queue_timeouts,
+            'queue_wait_avg_ms': self._wait_total / self._queued * 1000 if self._queued else 0.0,
+            'queue_wait_max_ms': self._wait_max * 1000,
+        }
+
+    def _has_slot(self):
+        return self.limit <= 0 or self._in_flight < self.limit
+
+    def _admit(self):
+        self._in_flight += 1
+        self._admitted += 1
+
+    def _start_waiting(self):
+        """Join the queue, or raise AdmissionRejected if it is full."""
+        if self._waiting >= self.queue_size:
+            self._queue_full += 1
+            raise AdmissionRejected("Server busy; try again shortly", 'queue_full', self.retry_after)
+        self._waiting += 1
+        self._queued += 1
+
+    def _stop_waiting(self, waited, admitted):
+        self._waiting -= 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        if not admitted:
+            self._queue_timeouts += 1
+            raise AdmissionRejected("Server busy; try again shortly", 'queue_timeout', self.retry_after)
+
+
+class ConcurrencyLimiter(_BaseConcurrencyLimiter):
+    """Concurrency cap with a bounded wait queue, for threaded servers."""
+
+    def __init__(self, limit, queue_size=0, queue_timeout=1.0, retry_after=1.0):
+        super().__init__(limit, queue_size, queue_timeout, retry_after)
+        self._cond = threading.Condition()
+
+    def stats(self):
+        with self._cond:
+            return super().stats()
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed, or raise AdmissionRejected."""
+        with self._cond:
+            if self._has_slot():
+                self._admit()
+                return
+            self._start_waiting()
+            started = time.monotonic()
+            admitted = self._cond.wait_for(self._has_slot, self.queue_timeout)
+            self._stop_waiting(time.monotonic() - started, admitted)
+            self._admit()
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AsyncConcurrencyLimiter(_BaseConcurrencyLimiter):
+    """Concurrency cap with a bounded wait queue, for one asyncio event loop."""
+
+    def __init__(self, limit, queue_size=0, queue_timeout=1.0, retry_after=1.0):
+        super().__init__(limit, queue_size, queue_timeout, retry_after)
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        """Take a slot, waiting in the queue if needed, or raise AdmissionRejected."""
+        if self._has_slot():
+            self._admit()
+            return
+        self._start_waiting()
+        started = time.monotonic()
+        try:
+            async with self._cond:
+                await asyncio.wait_for(self._cond.wait_for(self._has_slot), self.queue_timeout)
+            admitted = True
+        except asyncio.TimeoutError:
+            admitted = False
+        except BaseException:
+            # Cancelled while queued (client went away)
+            self._waiting -= 1
+            raise
+        self._stop_waiting(time.monotonic() - started, admitted)
+        self._admit()
+
+    async def release(self):
+        self._in_flight -= 1
+        async with self._cond:
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
@@ -3,11 +3,27 @@
 MediMate Voice Assistant - Main Application
 A medical voice assistant that uses the Heygen Streaming API.
 """
+import json
+import math
+import multiprocessing
 import os
-from flask import Flask, render_template, request, jsonify
+import time
+from concurrent.futures import ProcessPoolExecutor
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
 import requests
 from dotenv import load_dotenv
 
+from admission import AdmissionRejected, ConcurrencyLimiter, RateLimiter
+from avatars import AVATAR_SNAPSHOT_PATH, AvatarCatalog
+from batch import item_text, ordered_map, parse_ndjson
+from cache import LRUCache, make_etag, normalize_query
+from heygen_client import HeygenClient
+from knowledge import KNOWLEDGE_PATH, KnowledgeBase
+from metrics import Registry
+from profiler import SamplingProfiler, profile_requested, save_profile
+from sse import answer_events
+from token_pool import TokenPool
+
 # Load environment variables
 load_dotenv()
 
@@ -17,271 +33,414 @@ HEYGEN_API_BASE_URL = os.getenv('HEYGEN_API_BASE_URL', 'https://api.heygen.com')
 DEBUG = os.getenv('DEBUG', 'True').lower() in ('true', '1', 't')
 PORT = int(os.getenv('PORT', 5000))
 
-# Available avatars (these should match what Heygen provides)
-AVAILABLE_AVATARS = [
-    {'id': 'Wayne_20240711', 'name': 'Male Doctor', 'icon': 'fas fa-user-md'},
-    {'id': 'Onat_1731911456', 'name': 'Female Doctor', 'icon': 'fas fa-user-nurse'},
-    {'id': '1732832799', 'name': 'Cardiologist', 'icon': 'fas fa-heartbeat'},
-    {'id': '84a12ccb99774fd29bcb27727a9d38ed', 'name': 'Pediatrician', 'icon': 'fas fa-child'},
-    {'id': 'Michael_20240415', 'name': 'Neurologist', 'icon': 'fas fa-brain'},
-    {'id': 'Emily_20240320', 'name': 'Pharmacist', 'icon': 'fas fa-pills'}
-]
-
-# Medical domain keywords to identify medical queries
-MEDICAL_KEYWORDS = [
-    # General medical terms
-    'health', 'medical', 'doctor', 'hospital', 'symptom', 'pain', 'treatment', 
-    'medicine', 'disease', 'diagnosis', 'prescription', 'dose', 'therapy',
-    'allergy', 'vaccination', 'surgery', 'emergency', 'vaccine', 'drug',
-    'specialist', 'clinic', 'ache', 'discomfort', 'condition', 'illness',
-    'remedy', 'cure', 'healing', 'wellness', 'complication',
-    
-    # Body parts
-    'blood', 'heart', 'lung', 'kidney', 'liver', 'brain', 'stomach', 'intestine',
-    'colon', 'skin', 'bone', 'joint', 'muscle', 'nerve', 'artery', 'vein',
-    'throat', 'ear', 'eye', 'nose', 'mouth', 'head', 'neck', 'chest', 'back',
-    'arm', 'leg', 'foot', 'hand', 'finger', 'toe', 'shoulder', 'knee', 'hip',
-    'ankle', 'wrist', 'spine', 'abdomen', 'lymph', 'thyroid', 'pancreas',
-    
-    # Common symptoms
-    'headache', 'fever', 'cough', 'cold', 'flu', 'covid', 'virus', 'dizziness',
-    'nausea', 'vomiting', 'diarrhea', 'constipation', 'fatigue', 'tired',
-    'rash', 'itch', 'swelling', 'inflammation', 'infection', 'bleeding', 'bruise',
-    'sneeze', 'congestion', 'sore', 'stiff', 'weak', 'cramp', 'spasm',
-    'insomnia', 'snore', 'breathe', 'breath', 'dizzy', 'faint', 'unconscious',
-    'numbness', 'tingle', 'burn', 'chills', 'sweat', 'weight',
-    
-    # Conditions and diseases
-    'diabetes', 'hypertension', 'pressure', 'cancer', 'stroke', 'arthritis',
-    'asthma', 'allergy', 'alzheimer', 'dementia', 'parkinson', 'epilepsy',
-    'seizure', 'depression', 'anxiety', 'adhd', 'autism', 'bipolar', 'schizophrenia',
-    'pneumonia', 'bronchitis', 'emphysema', 'copd', 'influenza', 'hepatitis',
-    'cirrhosis', 'ulcer', 'irritable', 'ibs', 'crohn', 'colitis', 'celiac',
-    'anemia', 'hemophilia', 'leukemia', 'lymphoma', 'melanoma', 'carcinoma',
-    'tumor', 'cyst', 'polyp', 'hernia', 'appendicitis', 'gallstone', 'kidney stone',
-    'osteoporosis', 'scoliosis', 'fibromyalgia', 'migraine', 'concussion',
-    'fracture', 'sprain', 'strain', 'tear', 'rupture', 'tendonitis', 'bursitis',
-    'gout', 'lupus', 'ms', 'sclerosis', 'als', 'hiv', 'aids', 'std', 'sti',
-    'herpes', 'hpv', 'gonorrhea', 'chlamydia', 'syphilis', 'ebola', 'malaria',
-    'tuberculosis', 'lyme', 'meningitis', 'thyroid', 'goiter', 'grave', 'hashimoto',
-    'addison', 'cushing', 'diabetes', 'gerd', 'reflux', 'psoriasis', 'eczema',
-    'acne', 'rosacea', 'vertigo', 'tinnitus', 'glaucoma', 'cataract', 'macular',
-    
-    # Medical specialties
-    'cardiology', 'neurology', 'gastroenterology', 'dermatology', 'orthopedic',
-    'pediatric', 'gynecology', 'obstetrics', 'urology', 'endocrinology',
-    'psychiatry', 'psychology', 'oncology', 'radiology', 'immunology',
-    'pulmonology', 'rheumatology', 'nephrology', 'hematology',
-    
-    # Health topics
-    'nutrition', 'diet', 'exercise', 'fitness', 'sleep', 'stress', 'mental',
-    'pregnancy', 'prenatal', 'postnatal', 'breastfeeding', 'vaccine', 'immunization',
-    'vitamin', 'mineral', 'supplement', 'probiotic', 'antibiotic', 'antiseptic',
-    'hygiene', 'sanitation', 'prevention', 'screening', 'checkup', 'mortality',
-    'longevity', 'disability', 'therapy', 'rehabilitation', 'prescription',
-    'medication', 'pharmacy', 'generic', 'side effect', 'overdose', 'addiction',
-    'withdrawal', 'deficiency', 'insulin', 'testosterone', 'estrogen', 'hormone',
-    'contraceptive', 'fertility', 'infertility', 'ivf', 'menopause', 'menstruation',
-    'childbirth', 'neonatal', 'pediatric', 'geriatric', 'elderly', 'chronic',
-    'acute', 'terminal', 'palliative', 'hospice', 'recovery', 'remission',
-    'biopsy', 'scan', 'mri', 'ct', 'x-ray', 'ultrasound', 'ekg', 'ecg', 'eeg'
-]
-
-# Initialize Flask app
-app = Flask(__name__)
-
-def is_medical_query(text):
+# Heygen HTTP client
+HEYGEN_POOL_SIZE = int(os.getenv('HEYGEN_POOL_SIZE', 10))
+HEYGEN_CONNECT_TIMEOUT = float(os.getenv('HEYGEN_CONNECT_TIMEOUT', 3.05))
+HEYGEN_READ_TIMEOUT = float(os.getenv('HEYGEN_READ_TIMEOUT', 10))
+HEYGEN_MAX_RETRIES = int(os.getenv('HEYGEN_MAX_RETRIES', 2))
+
+# Streaming token pool (size 0 mints every token on demand)
+TOKEN_POOL_SIZE = int(os.getenv('TOKEN_POOL_SIZE', 2))
+TOKEN_TTL = int(os.getenv('TOKEN_TTL', 600))
+TOKEN_REFRESH_MARGIN = int(os.getenv('TOKEN_REFRESH_MARGIN', 60))
+
+# Batch check_query (0 workers processes batches in the request thread)
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', 0))
+BATCH_CHUNK_SIZE = int(os.getenv('BATCH_CHUNK_SIZE', 64))
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/jsonlines')
+
+# check_query response cache (size 0 disables it, TTL 0 keeps entries until evicted)
+CHECK_QUERY_CACHE_SIZE = int(os.getenv('CHECK_QUERY_CACHE_SIZE', 4096))
+CHECK_QUERY_CACHE_TTL = float(os.getenv('CHECK_QUERY_CACHE_TTL', 0)) or None
+
+# Keyword and topic tables, and how often to check them for changes (seconds)
+KNOWLEDGE_FILE = os.getenv('KNOWLEDGE_FILE', KNOWLEDGE_PATH)
+KNOWLEDGE_RELOAD_INTERVAL = float(os.getenv('KNOWLEDGE_RELOAD_INTERVAL', 5))
+
+# Spelling tolerance for speech-to-text near misses ("diabetis", "migrane"): the
+# most edits a corrected word may have (0 disables it) and the shortest term corrected to
+FUZZY_MAX_DISTANCE = int(os.getenv('FUZZY_MAX_DISTANCE', 2))
+FUZZY_MIN_LENGTH = int(os.getenv('FUZZY_MIN_LENGTH', 5))
+
+# Avatar catalog snapshot written by avatars.py, and how long clients may cache /api/config
+AVATAR_SNAPSHOT = os.getenv('AVATAR_SNAPSHOT', AVATAR_SNAPSHOT_PATH)
+AVATAR_RELOAD_INTERVAL = float(os.getenv('AVATAR_RELOAD_INTERVAL', 30))
+CONFIG_MAX_AGE = int(os.getenv('CONFIG_MAX_AGE', 60))
+
+# Per-request profiling: when PROFILE_TOKEN is set, requests sent with an "X-Profile"
+# header equal to it are sampled and the collapsed stacks written to PROFILE_DIR,
+# which keeps the newest PROFILE_MAX_FILES profiles
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 100))
+
+# Admission control: per-client request rates (requests per second, 0 disables) and
+# bursts, and how many create_token requests may wait on Heygen at once, with a
+# bounded queue (and the longest queue wait, seconds) in front; the rest get 429.
+# Rates are off by default: clients are told apart by address, and behind a proxy
+# that does not set X-Forwarded-For every user would share one bucket
+CREATE_TOKEN_RATE = float(os.getenv('CREATE_TOKEN_RATE', 0))
+CREATE_TOKEN_BURST = int(os.getenv('CREATE_TOKEN_BURST', 5))
+CHECK_QUERY_RATE = float(os.getenv('CHECK_QUERY_RATE', 0))
+CHECK_QUERY_BURST = int(os.getenv('CHECK_QUERY_BURST', 20))
+UPSTREAM_CONCURRENCY = int(os.getenv('UPSTREAM_CONCURRENCY', 8))
+UPSTREAM_QUEUE_SIZE = int(os.getenv('UPSTREAM_QUEUE_SIZE', 32))
+UPSTREAM_QUEUE_TIMEOUT = float(os.getenv('UPSTREAM_QUEUE_TIMEOUT', 2))
+# Identify clients by the first X-Forwarded-For address; only behind a proxy that sets it
+TRUST_X_FORWARDED_FOR = os.getenv('TRUST_X_FORWARDED_FOR', 'False').lower() in ('true', '1', 't')
+
+# Medical keywords, response topics and the non-medical reply, reloaded when the file changes
+KNOWLEDGE = KnowledgeBase(
+    KNOWLEDGE_FILE,
+    reload_interval=KNOWLEDGE_RELOAD_INTERVAL,
+    fuzzy_max_distance=FUZZY_MAX_DISTANCE,
+    fuzzy_min_length=FUZZY_MIN_LENGTH
+)
+
+# Responses keyed on normalized query text
+CHECK_QUERY_CACHE = LRUCache(CHECK_QUERY_CACHE_SIZE, CHECK_QUERY_CACHE_TTL)
+
+# Metrics served at /metrics
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.histogram(
+    'medimate_request_seconds', 'Time to handle a request, by route, method and status.',
+    ('route', 'method', 'status'))
+CLASSIFIER_SECONDS = REGISTRY.histogram(
+    'medimate_classifier_seconds', 'Time to decide whether an uncached query is medical.')
+RESPONDER_SECONDS = REGISTRY.histogram(
+    'medimate_responder_seconds', 'Time to pick the topic response for an uncached medical query.')
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    'medimate_upstream_seconds', 'Heygen API call duration, by call and outcome.',
+    ('call', 'outcome'))
+TOPIC_MATCHES = REGISTRY.counter(
+    'medimate_topic_matches_total', 'check_query answers by topic (non_medical, or none if no topic matched).',
+    ('topic',))
+
+# Admission control for /api/create_token and /api/check_query
+CREATE_TOKEN_LIMITER = RateLimiter(CREATE_TOKEN_RATE, CREATE_TOKEN_BURST)
+CHECK_QUERY_LIMITER = RateLimiter(CHECK_QUERY_RATE, CHECK_QUERY_BURST)
+UPSTREAM_LIMITER = ConcurrencyLimiter(
+    UPSTREAM_CONCURRENCY,
+    queue_size=UPSTREAM_QUEUE_SIZE,
+    queue_timeout=UPSTREAM_QUEUE_TIMEOUT
+)
+
+# Avatars offered to users; falls back to avatars.DEFAULT_AVATARS until a snapshot exists
+AVATAR_CATALOG = AvatarCatalog(AVATAR_SNAPSHOT, reload_interval=AVATAR_RELOAD_INTERVAL)
+
+# Initialize Flask app (index.html lives next to this file)
+app = Flask(__name__, template_folder='.')
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if profile_requested(request.headers.get('X-Profile'), PROFILE_TOKEN):
+        g.profiler = SamplingProfiler().start()
+
+@app.after_request
+def record_request(response):
+    """Observe the request duration, and save its profile if one was taken.
+
+    For streamed responses this is the time until the body starts.
     """
-    Determines if a query is medical-related using simple keyword matching.
+    route = request.url_rule.rule if request.url_rule else '<unmatched>'
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        response.headers['X-Profile-Id'] = save_profile(PROFILE_DIR, route, profiler.stop(), PROFILE_MAX_FILES)
+    REQUEST_SECONDS.observe(time.perf_counter() - g.request_started,
+                            route, request.method, str(response.status_code))
+    return response
+
+@app.errorhandler(AdmissionRejected)
+def admission_rejected(e):
+    """Shed requests get 429 and a whole-second Retry-After."""
+    retry_after = str(max(1, math.ceil(e.retry_after)))
+    return jsonify({"error": str(e), "reason": e.reason}), 429, {'Retry-After': retry_after}
+
+def client_id(request):
+    """Return the address admission control counts a request against."""
+    if TRUST_X_FORWARDED_FOR and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr
+
+def find_medical_keywords(text):
+    """
+    Returns every medical keyword found in the text, with its position.
+    """
+    return KNOWLEDGE.current().matcher.find_all(text)
+
+def is_medical_query(text, knowledge=None):
+    """
+    Determines if a query is medical-related using whole-word keyword matching.
+    Misspelled terms are only corrected when no keyword matches as written.
+    """
+    knowledge = knowledge or KNOWLEDGE.current()
+    if knowledge.matcher.matches(text):
+        return True
+    corrected = knowledge.fuzzy_index.correct(text)
+    return corrected is not text and knowledge.matcher.matches(corrected)
+
+def find_medical_topic(query, knowledge=None):
     """
-    text_lower = text.lower()
-    for keyword in MEDICAL_KEYWORDS:
-        if keyword in text_lower:
-            return True
-    return False
+    Returns the topic (or subtopic) dict that answers a query, or None.
+    Misspelled terms are only corrected when no topic matches as written.
+    """
+    knowledge = knowledge or KNOWLEDGE.current()
+    topic = knowledge.topic_index.lookup(query)
+    if topic is None:
+        corrected = knowledge.fuzzy_index.correct(query)
+        if corrected is not query:
+            topic = knowledge.topic_index.lookup(corrected)
+    return topic
+
+# Serialized documents that only change with the avatar catalog: name -> (version, body, etag)
+_catalog_documents = {}
+
+def catalog_document(name, build):
+    """Return (body, etag) for a document derived from the avatar catalog.
+
+    build() is only called again when the catalog version changes.
+    """
+    AVATAR_CATALOG.maybe_reload()
+    version = AVATAR_CATALOG.version
+    cached = _catalog_documents.get(name)
+    if cached is None or cached[0] != version:
+        body = build()
+        cached = _catalog_documents[name] = (version, body, make_etag(body))
+    return cached[1], cached[2]
+
+def config_body():
+    """Serialize the /api/config document."""
+    return json.dumps({
+        "api_base_url": HEYGEN_API_BASE_URL,
+        "avatars": AVATAR_CATALOG.avatars
+    }).encode()
+
+def conditional_response(body, etag, mimetype, cache_control):
+    """Send body with a strong ETag, or an empty 304 if the client already has it."""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
 
 @app.route('/')
 def index():
     """Render the main page."""
-    return render_template('index.html', avatars=AVAILABLE_AVATARS)
+    body, etag = catalog_document('index', lambda: render_template(
+        'index.html', avatars=AVATAR_CATALOG.avatars).encode())
+    return conditional_response(body, etag, 'text/html', 'no-cache')
+
+def record_upstream_call(name, elapsed, error):
+    UPSTREAM_SECONDS.observe(elapsed, name, 'error' if error else 'ok')
+
+# Shared keep-alive client for every Heygen call
+HEYGEN_CLIENT = HeygenClient(
+    HEYGEN_API_KEY,
+    HEYGEN_API_BASE_URL,
+    pool_size=HEYGEN_POOL_SIZE,
+    connect_timeout=HEYGEN_CONNECT_TIMEOUT,
+    read_timeout=HEYGEN_READ_TIMEOUT,
+    max_retries=HEYGEN_MAX_RETRIES,
+    on_call=record_upstream_call
+)
+
+# Tokens are minted in the background; the refill thread starts on first use
+TOKEN_POOL = TokenPool(
+    HEYGEN_CLIENT.create_streaming_token,
+    size=TOKEN_POOL_SIZE,
+    ttl=TOKEN_TTL,
+    refresh_margin=TOKEN_REFRESH_MARGIN
+)
+
+@REGISTRY.add_collector
+def collect_component_stats():
+    """Cache, token pool, circuit breaker and knowledge gauges, read at scrape time."""
+    cache = CHECK_QUERY_CACHE.stats()
+    for key in ('size', 'hits', 'misses', 'evictions', 'expirations'):
+        yield 'medimate_check_query_cache_' + key, f'check_query cache {key}.', {}, cache[key]
+    pool = TOKEN_POOL.stats()
+    for key in ('available', 'hits', 'misses', 'shared_misses', 'refills', 'refill_errors'):
+        yield 'medimate_token_pool_' + key, f'Streaming token pool {key}.', {}, pool[key]
+    heygen = HEYGEN_CLIENT.stats()
+    yield 'medimate_heygen_circuit_open', 'Whether the Heygen circuit breaker is refusing calls.', {}, int(heygen['circuit_state'] == 'open')
+    yield 'medimate_heygen_circuit_rejected', 'Heygen calls refused by the open circuit breaker.', {}, heygen['circuit_rejected']
+    for name, limiter in (('create_token', CREATE_TOKEN_LIMITER), ('check_query', CHECK_QUERY_LIMITER)):
+        limits = limiter.stats()
+        yield 'medimate_admission_admitted', 'Requests admitted by the per-client rate limit.', {'route': name}, limits['admitted']
+        yield 'medimate_admission_rate_limited', 'Requests shed by the per-client rate limit.', {'route': name}, limits['rate_limited']
+    upstream = UPSTREAM_LIMITER.stats()
+    for key in ('in_flight', 'waiting', 'queued', 'shed_queue_full', 'shed_queue_timeout'):
+        yield 'medimate_upstream_admission_' + key, f'create_token requests waiting on Heygen: {key}.', {}, upstream[key]
+    yield 'medimate_knowledge_info', 'Version of the knowledge file in use.', {'version': KNOWLEDGE.current().version}, 1
+    yield 'medimate_knowledge_reloads', 'Knowledge file reloads since startup.', {}, KNOWLEDGE.reloads
+    yield 'medimate_knowledge_reload_errors', 'Changed knowledge files that failed to load.', {}, KNOWLEDGE.reload_errors
 
 @app.route('/api/create_token', methods=['POST'])
 def create_token():
     """Create a session token for Heygen Streaming API."""
+    CREATE_TOKEN_LIMITER.acquire(client_id(request))
     try:
-        response = requests.post(
-            f"{HEYGEN_API_BASE_URL}/v1/streaming.create_token",
-            headers={
-                "Content-Type": "application/json",
-                "X-Api-Key": HEYGEN_API_KEY
-            }
-        )
-        response.raise_for_status()
-        return jsonify(response.json())
+        return jsonify(TOKEN_POOL.acquire(admit=UPSTREAM_LIMITER.slot))
     except requests.exceptions.RequestException as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/token_pool', methods=['GET'])
+def token_pool_stats():
+    """Return token pool hit/miss and refill latency statistics."""
+    return jsonify(TOKEN_POOL.stats())
+
+@app.route('/api/admission', methods=['GET'])
+def admission_stats():
+    """Return admitted, queued and shed request counts."""
+    return jsonify({
+        'create_token': CREATE_TOKEN_LIMITER.stats(),
+        'check_query': CHECK_QUERY_LIMITER.stats(),
+        'upstream': UPSTREAM_LIMITER.stats(),
+    })
+
 @app.route('/api/check_query', methods=['POST'])
 def check_query():
     """Check if a query is medical-related and generate a response."""
+    CHECK_QUERY_LIMITER.acquire(client_id(request))
     data = request.json
     query_text = data.get('text', '')
-    
-    is_medical = is_medical_query(query_text)
-    
-    if is_medical:
-        # Generate a medical response
-        response = generate_medical_response(query_text)
-        return jsonify({"is_medical": True, "response": response})
+    return jsonify(check_query_payload(query_text))
+
+@app.route('/api/check_query/stream', methods=['POST'])
+def check_query_stream():
+    """Like check_query, but streams the response as Server-Sent Events.
+
+    Each sentence is sent as a "chunk" event as soon as the query has been
+    classified, followed by a "done" event with the full check_query body.
+    """
+    CHECK_QUERY_LIMITER.acquire(client_id(request))
+    data = request.json
+    query_text = data.get('text', '')
+    payload = check_query_payload(query_text)
+    return Response(
+        stream_with_context(answer_events(payload)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/check_query/batch', methods=['POST'])
+def check_query_batch():
+    """Check many queries, streaming back one NDJSON result per item in order.
+
+    The body is either a JSON array or NDJSON (one item per line); each item
+    is a query string or an object with a "text" field, as for check_query.
+    """
+    CHECK_QUERY_LIMITER.acquire(client_id(request))
+    if request.mimetype in NDJSON_MIMETYPES:
+        items = parse_ndjson(request.stream)
     else:
-        return jsonify({
-            "is_medical": False, 
-            "response": "I'm sorry, I can only provide assistance with medical-related questions. Please ask me something related to healthcare or medical information."
-        })
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            return jsonify({"error": "Expected a JSON array or an NDJSON body"}), 400
+
+    results = ordered_map(check_batch_item, items, get_batch_executor(), BATCH_CHUNK_SIZE)
+    return Response(stream_with_context(batch_lines(results)), mimetype='application/x-ndjson')
+
+@app.route('/api/check_query/cache', methods=['GET'])
+def check_query_cache_stats():
+    """Return check_query cache hit rate and eviction statistics."""
+    return jsonify(CHECK_QUERY_CACHE.stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Return request, classifier, responder and upstream metrics for Prometheus."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """Return application configuration for the frontend."""
-    return jsonify({
-        "api_base_url": HEYGEN_API_BASE_URL,
-        "avatars": AVAILABLE_AVATARS
-    })
+    body, etag = catalog_document('config', config_body)
+    return conditional_response(body, etag, 'application/json', f'public, max-age={CONFIG_MAX_AGE}')
+
+def check_query_payload(query_text):
+    """Build the /api/check_query response body for a query.
+
+    Bodies are cached on the normalized text, which is also what gets
+    classified, so a cached answer is always the one a fresh lookup gives.
+    The whole request uses one knowledge snapshot, even if a reload swaps
+    in another meanwhile.
+    """
+    topic_name, payload = check_query_entry(query_text)
+    TOPIC_MATCHES.inc(topic_name)
+    return payload
+
+def check_query_entry(query_text):
+    """Return (topic name, response body) for a query, from the cache if possible."""
+    knowledge = KNOWLEDGE.current()
+    # Free answers cached under an older snapshot. Keys carry the version
+    # too, so an answer built from the old snapshot by a request that was
+    # still running when the new one arrived can never be served.
+    CHECK_QUERY_CACHE.ensure_version(knowledge.version)
+    query_key = (knowledge.version, normalize_query(query_text))
+    entry = CHECK_QUERY_CACHE.get(query_key)
+    if entry is None:
+        entry = _build_check_query_payload(query_key[1], knowledge)
+        CHECK_QUERY_CACHE.put(query_key, entry)
+    return entry
+
+def _build_check_query_payload(query_text, knowledge):
+    """Return (topic name, response body) for a normalized query."""
+    with CLASSIFIER_SECONDS.time():
+        medical = is_medical_query(query_text, knowledge)
+    if not medical:
+        return 'non_medical', {"is_medical": False, "response": knowledge.non_medical_response}
+    # Generate a medical response
+    with RESPONDER_SECONDS.time():
+        topic = find_medical_topic(query_text, knowledge)
+    if topic is None:
+        return 'none', {"is_medical": True, "response": None}
+    return topic['name'], {"is_medical": True, "response": topic['response']}
+
+def check_batch_item(item):
+    """check_query_entry for one batch item; a bad item gives (None, {"error": ...}).
+
+    With BATCH_WORKERS this runs in a worker process, whose metrics the
+    parent never sees, so topics are counted by batch_lines instead.
+    """
+    if isinstance(item, Exception):
+        return None, {"error": str(item)}
+    try:
+        query_text = item_text(item)
+    except ValueError as e:
+        return None, {"error": str(e)}
+    return check_query_entry(query_text)
+
+def batch_lines(results):
+    """Yield one NDJSON line per check_batch_item result, counting its topic."""
+    for topic_name, payload in results:
+        if topic_name is not None:
+            TOPIC_MATCHES.inc(topic_name)
+        yield json.dumps(payload) + '\n'
+
+_batch_executor = None
+
+def get_batch_executor():
+    """Return the shared process pool for batches, or None when disabled."""
+    global _batch_executor
+    if BATCH_WORKERS > 0 and _batch_executor is None:
+        # spawn: forking a process that runs the token pool thread is unsafe
+        _batch_executor = ProcessPoolExecutor(
+            max_workers=BATCH_WORKERS,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _batch_executor
 
 def generate_medical_response(query):
     """Generate a response to a medical query.
     In a production environment, this would use a medical knowledge base or API.
     """
-    query_lower = query.lower()
-    
-    # COMMON SYMPTOMS
-    # Headaches and migraines
-    if any(word in query_lower for word in ['headache', 'head pain', 'migraine']):
-        return "Headaches can have many causes, including stress, dehydration, lack of sleep, or eye strain. For occasional headaches, rest, hydration, and over-the-counter pain relievers may help. If you experience severe, persistent, or unusual headaches, please consult a healthcare provider for proper diagnosis and treatment. Migraines specifically can cause throbbing pain, sensitivity to light and sound, and sometimes nausea. They might benefit from specific migraine medications."
-    
-    # Fever
-    elif any(word in query_lower for word in ['fever', 'temperature', 'hot']):
-        return "A fever is usually a sign that your body is fighting an infection. Adults with a temperature above 100.4°F (38°C) have a fever. Rest, hydration, and over-the-counter fever reducers can help manage mild fevers. If the fever is high (above 103°F or 39.4°C), lasts more than 3 days, or is accompanied by severe symptoms, please seek medical attention. Fevers in infants and young children should be evaluated by a healthcare provider promptly."
-    
-    # Respiratory issues
-    elif any(word in query_lower for word in ['cold', 'flu', 'cough', 'sneeze', 'congestion', 'stuffy nose']):
-        return "Common cold and flu symptoms include coughing, sneezing, congestion, and sometimes fever. Rest, hydration, and over-the-counter medications can help manage symptoms. Most colds resolve within 7-10 days. Flu may last longer and can cause more severe symptoms. For persistent cough, difficulty breathing, or symptoms that worsen after initially improving, please consult a healthcare provider. Annual flu vaccines are recommended to reduce the risk of influenza."
-    
-    # Digestive issues
-    elif any(word in query_lower for word in ['stomach', 'nausea', 'vomiting', 'diarrhea', 'constipation', 'ibs', 'indigestion', 'heartburn', 'gerd', 'reflux']):
-        return "Digestive issues can range from mild discomfort to more serious conditions. For occasional nausea, vomiting, or diarrhea, staying hydrated is important. Clear liquids and bland foods can help when returning to eating. For heartburn or reflux, avoiding spicy foods, large meals, and eating close to bedtime may help. If symptoms are severe, persistent, or accompanied by weight loss, blood in stool, or difficulty swallowing, please seek medical attention promptly. Chronic digestive issues like IBS benefit from medical management."
-    
-    # Skin conditions
-    elif any(word in query_lower for word in ['rash', 'itch', 'acne', 'eczema', 'psoriasis', 'hives', 'skin', 'dermatitis']):
-        return "Skin conditions can be caused by allergies, infections, immune system disorders, or environmental factors. For mild itching or rashes, over-the-counter antihistamines or hydrocortisone cream may provide relief. Keeping the skin moisturized and avoiding harsh soaps can help with eczema and dry skin. For severe, widespread, or painful skin conditions, or those that don't improve with home care, please consult a dermatologist. Conditions like psoriasis and chronic eczema typically require medical management."
-    
-    # Pain
-    elif any(word in query_lower for word in ['pain', 'ache', 'sore', 'hurt']):
-        if any(word in query_lower for word in ['back', 'spine', 'neck']):
-            return "Back and neck pain are common and often related to muscle strain, poor posture, or overuse. Rest, gentle stretching, proper posture, and over-the-counter pain relievers may help. Heat or ice can also provide relief. For pain that is severe, persistent, or accompanied by numbness, tingling, or weakness in the limbs, please seek medical attention. Physical therapy can be beneficial for chronic back or neck issues."
-        elif any(word in query_lower for word in ['joint', 'arthritis', 'knee', 'hip', 'shoulder', 'elbow']):
-            return "Joint pain can be caused by injury, overuse, or conditions like arthritis. Rest, over-the-counter pain relievers, and ice or heat may help manage symptoms. Maintaining a healthy weight reduces stress on joints, particularly knees and hips. For severe, persistent, or worsening joint pain, especially if accompanied by swelling, redness, or reduced mobility, please consult a healthcare provider. Conditions like rheumatoid arthritis benefit from early medical intervention."
-        elif any(word in query_lower for word in ['chest', 'heart']):
-            return "Chest pain can be caused by various conditions, from muscle strain to serious heart problems. If you're experiencing severe chest pain, especially if it's accompanied by shortness of breath, sweating, nausea, or pain radiating to the arm, jaw, or back, please seek emergency medical attention immediately. These could be signs of a heart attack. Even if chest pain seems mild, it's important to have it evaluated by a healthcare provider to rule out serious conditions."
-        elif any(word in query_lower for word in ['abdominal', 'stomach', 'belly']):
-            return "Abdominal pain can have many causes, from gas and indigestion to more serious conditions like appendicitis or gallstones. Mild, temporary pain may be managed with rest and over-the-counter medications. For severe, persistent, or worsening abdominal pain, especially if accompanied by fever, vomiting, or signs of dehydration, please seek medical attention. Sudden, severe abdominal pain could indicate a medical emergency requiring immediate care."
-        else:
-            return "Pain can be a symptom of many different conditions and may require different approaches to management. For mild pain, rest, ice or heat, and over-the-counter pain relievers may help. For severe, persistent, or worsening pain, especially if it limits your daily activities or is accompanied by other concerning symptoms, please consult a healthcare provider. Chronic pain often benefits from a comprehensive treatment approach that may include medication, physical therapy, and lifestyle modifications."
-    
-    # Fatigue
-    elif any(word in query_lower for word in ['fatigue', 'tired', 'exhausted', 'energy', 'lethargy']):
-        return "Fatigue can result from various factors including poor sleep, stress, overexertion, or medical conditions. Ensuring adequate sleep, regular physical activity, a balanced diet, and stress management can help improve energy levels. If fatigue is severe, persistent, or not improved with rest, it could indicate an underlying health issue such as anemia, thyroid disorders, or depression. If fatigue significantly impacts your daily life or is accompanied by other symptoms, please consult a healthcare provider for evaluation."
-    
-    # Sleep issues
-    elif any(word in query_lower for word in ['sleep', 'insomnia', 'apnea', 'snore', 'snoring']):
-        return "Quality sleep is crucial for overall health. Adults typically need 7-9 hours of sleep per night. Poor sleep can affect mood, cognitive function, and physical health. Establishing a regular sleep schedule, creating a restful environment, and avoiding caffeine and screens before bedtime can help improve sleep quality. Sleep apnea, characterized by interrupted breathing during sleep and often accompanied by snoring, may require medical intervention. If you're experiencing persistent sleep problems, consider consulting a healthcare provider for proper evaluation and treatment options."
-    
-    # CHRONIC CONDITIONS
-    # Cardiovascular
-    elif any(word in query_lower for word in ['blood pressure', 'hypertension', 'hypotension']):
-        return "Normal blood pressure is typically around 120/80 mmHg. Hypertension (high blood pressure) is generally considered to be 130/80 mmHg or higher. Lifestyle changes like reducing sodium intake, regular exercise, maintaining a healthy weight, and limiting alcohol can help manage blood pressure. Hypotension (low blood pressure) can cause dizziness and fainting. If you have concerns about your blood pressure or experience symptoms like severe headaches, chest pain, or dizziness, please consult a healthcare provider for proper evaluation and treatment recommendations."
-    
-    # Heart disease
-    elif any(word in query_lower for word in ['heart disease', 'cardiac', 'heart attack', 'angina', 'coronary']):
-        return "Heart disease encompasses various conditions affecting the heart, including coronary artery disease, heart rhythm problems, and heart valve issues. Symptoms may include chest pain or discomfort (angina), shortness of breath, and fatigue. Risk factors include high blood pressure, high cholesterol, smoking, diabetes, obesity, and family history. A heart-healthy lifestyle includes regular exercise, a balanced diet low in saturated fats and sodium, not smoking, and managing stress. If you experience chest pain, shortness of breath, or other concerning symptoms, please seek immediate medical attention."
-    
-    # Stroke
-    elif any(word in query_lower for word in ['stroke', 'tia', 'transient ischemic']):
-        return "A stroke occurs when blood flow to part of the brain is interrupted, causing brain cells to die. Symptoms include sudden numbness or weakness (especially on one side of the body), confusion, trouble speaking or understanding speech, vision problems, dizziness, or severe headache. Remember the acronym FAST for stroke symptoms: Face drooping, Arm weakness, Speech difficulty, Time to call emergency services. Prompt treatment is crucial to minimize brain damage. Risk factors include high blood pressure, smoking, diabetes, and high cholesterol. If you suspect someone is having a stroke, seek emergency medical attention immediately."
-    
-    # Diabetes
-    elif any(word in query_lower for word in ['diabetes', 'blood sugar', 'glucose', 'insulin']):
-        return "Diabetes is a condition that affects how your body processes blood sugar (glucose). There are several types, with Type 1, Type 2, and gestational diabetes being the most common. Symptoms may include increased thirst, frequent urination, hunger, fatigue, and blurred vision. Managing diabetes typically involves monitoring blood sugar, medication (including insulin for some), healthy eating, regular physical activity, and maintaining a healthy weight. Complications can affect the heart, kidneys, eyes, and nerves, making regular medical check-ups important. If you have concerns about diabetes or experience symptoms, please consult a healthcare provider for proper evaluation."
-    
-    # Cancer
-    elif any(word in query_lower for word in ['cancer', 'tumor', 'oncology', 'chemotherapy', 'radiation', 'malignant']):
-        return "Cancer occurs when abnormal cells divide uncontrollably and can invade nearby tissues. There are many types of cancer, affecting different parts of the body. Symptoms vary widely depending on the type and stage but may include unexplained weight loss, fatigue, pain, changes in skin, unusual bleeding, or persistent cough. Risk factors include genetic predisposition, certain infections, radiation exposure, and lifestyle factors like tobacco use. Treatment options may include surgery, chemotherapy, radiation therapy, immunotherapy, and targeted therapy. Early detection through regular screenings and prompt medical attention for concerning symptoms is important. If you notice unusual changes in your body, please consult a healthcare provider."
-    
-    # Respiratory diseases
-    elif any(word in query_lower for word in ['asthma', 'copd', 'emphysema', 'bronchitis', 'pneumonia', 'lung disease']):
-        return "Respiratory diseases affect the lungs and breathing. Asthma causes airway inflammation and breathing difficulty, often triggered by allergens or exercise. COPD (including emphysema and chronic bronchitis) typically results from long-term exposure to irritants like tobacco smoke. Pneumonia is an infection that inflames air sacs in the lungs. Symptoms of respiratory conditions may include shortness of breath, coughing, wheezing, and chest tightness. Management depends on the specific condition but may include medications, inhalers, oxygen therapy, pulmonary rehabilitation, and avoiding triggers. If you experience breathing difficulties, persistent cough, or other respiratory symptoms, please seek medical evaluation."
-    
-    # Autoimmune disorders
-    elif any(word in query_lower for word in ['autoimmune', 'lupus', 'rheumatoid arthritis', 'multiple sclerosis', 'ms', 'psoriasis', 'crohn', 'celiac']):
-        return "Autoimmune disorders occur when the immune system mistakenly attacks the body's own tissues. There are over 80 types, including rheumatoid arthritis, lupus, multiple sclerosis, psoriasis, Crohn's disease, and celiac disease. Symptoms vary widely but may include fatigue, joint pain, skin problems, digestive issues, and recurrent fever. Many autoimmune conditions have genetic components and may be triggered by environmental factors or infections. Treatment typically aims to reduce inflammation, manage symptoms, and modulate the immune system. If you experience persistent, unusual symptoms that affect multiple body systems, please consult a healthcare provider for evaluation."
-    
-    # Neurological disorders
-    elif any(word in query_lower for word in ['alzheimer', 'dementia', 'parkinson', 'epilepsy', 'seizure', 'neuropathy', 'multiple sclerosis', 'ms']):
-        return "Neurological disorders affect the brain, spinal cord, and nerves. Alzheimer's disease and other dementias cause progressive memory loss and cognitive decline. Parkinson's disease affects movement, causing tremors, stiffness, and balance problems. Epilepsy involves recurrent seizures. Multiple sclerosis damages the protective covering of nerves. Symptoms vary widely based on the condition but may include memory problems, tremors, muscle weakness, pain, seizures, or difficulty with coordination. Treatment depends on the specific disorder and may include medications, physical therapy, lifestyle modifications, and in some cases, surgery. If you experience concerning neurological symptoms, please consult a healthcare provider for proper evaluation."
-    
-    # MENTAL HEALTH
-    elif any(word in query_lower for word in ['stress', 'anxiety', 'depression', 'mental health', 'panic', 'bipolar', 'schizophrenia', 'ocd', 'ptsd']):
-        return "Mental health is as important as physical health. Conditions like depression, anxiety, bipolar disorder, schizophrenia, OCD, and PTSD are medical conditions that affect mood, thinking, and behavior. Symptoms vary but may include persistent sadness, excessive worry, mood swings, abnormal thought patterns, or flashbacks to traumatic events. Effective treatments include therapy, medication, lifestyle changes, and support groups. The combination of treatments depends on the individual and the specific condition. If you're struggling with mental health concerns, please reach out to a healthcare provider or mental health professional. Remember that seeking help is a sign of strength, and many mental health conditions respond well to treatment."
-    
-    # LIFESTYLE & PREVENTION
-    # Diet and nutrition
-    elif any(word in query_lower for word in ['diet', 'nutrition', 'food', 'eat', 'weight', 'obesity', 'underweight']):
-        return "A balanced diet is essential for good health. This includes a variety of fruits, vegetables, whole grains, lean proteins, and healthy fats. Limiting processed foods, added sugars, and excessive salt is recommended. Nutritional needs can vary based on age, sex, activity level, and health conditions. Maintaining a healthy weight reduces the risk of many chronic diseases including diabetes, heart disease, and certain cancers. If you're concerned about your weight or nutritional status, consider consulting a healthcare provider or registered dietitian for personalized advice. Remember that sustainable dietary changes, rather than extreme diets, tend to be most effective for long-term health."
-    
-    # Exercise and fitness
-    elif any(word in query_lower for word in ['exercise', 'workout', 'fitness', 'physical activity', 'sedentary']):
-        return "Regular physical activity offers numerous health benefits, including weight management, stronger bones and muscles, and reduced risk of various diseases like heart disease, stroke, type 2 diabetes, and some cancers. Adults should aim for at least 150 minutes of moderate-intensity exercise per week, along with muscle-strengthening activities twice weekly. Activities can include walking, swimming, cycling, strength training, or sports. Starting slowly and gradually increasing intensity and duration is recommended, especially if you've been inactive. Always consult a healthcare provider before beginning a new exercise program, especially if you have existing health conditions."
-    
-    # Preventive care
-    elif any(word in query_lower for word in ['prevention', 'screening', 'checkup', 'vaccine', 'immunization']):
-        return "Preventive healthcare helps identify and address health issues before they become serious. This includes regular check-ups, screening tests (like mammograms, colonoscopies, and blood pressure checks), and vaccinations. The recommended screenings and their frequency depend on factors like age, sex, family history, and personal risk factors. Vaccines are important tools for preventing infectious diseases and are recommended throughout life, not just in childhood. Staying up-to-date with preventive care helps maintain good health and can detect conditions early when they're most treatable. Your healthcare provider can help determine which preventive measures are appropriate for you."
-    
-    # SPECIAL POPULATIONS
-    # Women's health
-    elif any(word in query_lower for word in ['menstruation', 'period', 'menopause', 'pregnancy', 'breast', 'cervical', 'ovarian', 'uterine', 'gynecological']):
-        return "Women's health encompasses various aspects including reproductive health, pregnancy, menopause, and conditions that primarily affect women. Regular gynecological check-ups and screenings like Pap tests and mammograms are important for preventive care. Menstrual irregularities, pelvic pain, or unusual vaginal discharge should be evaluated by a healthcare provider. During pregnancy, prenatal care is essential for the health of both mother and baby. Menopause, typically occurring in the late 40s to early 50s, involves hormonal changes that can cause symptoms like hot flashes and sleep disturbances. For specific concerns about women's health issues, please consult with a healthcare provider for personalized guidance."
-    
-    # Men's health
-    elif any(word in query_lower for word in ['prostate', 'testicular', 'erectile', 'male pattern baldness', 'men\'s health']):
-        return "Men's health includes issues related to the prostate, testicles, and conditions that primarily affect men. Regular check-ups can help detect conditions like prostate cancer early. The prostate-specific antigen (PSA) test and digital rectal exam are screening tools for prostate health. Testicular self-exams can help detect abnormalities. Erectile dysfunction may result from various physical or psychological factors and often has effective treatments available. Male pattern baldness is influenced by genetics and hormones, with various treatment options. For specific concerns about men's health issues, please consult with a healthcare provider for personalized evaluation and advice."
-    
-    # Children's health
-    elif any(word in query_lower for word in ['child', 'pediatric', 'infant', 'baby', 'toddler', 'adolescent', 'teen']):
-        return "Children's health requires special consideration of their developing bodies and immune systems. Regular well-child visits help monitor growth, development, and overall health. Vaccinations are crucial for preventing serious childhood diseases. Common childhood illnesses include colds, ear infections, and strep throat. For infants, proper nutrition (through breastfeeding or formula) and safe sleep practices are important. Adolescence brings physical, emotional, and social changes that may affect health. If you have concerns about a child's health, growth, or development, please consult a pediatrician or family doctor for appropriate evaluation and guidance."
-    
-    # Elderly health
-    elif any(word in query_lower for word in ['elderly', 'aging', 'geriatric', 'senior']):
-        return "Aging brings physiological changes that can affect health and well-being. Older adults may face challenges including multiple chronic conditions, medication management, increased fall risk, and changes in memory or cognitive function. Regular health check-ups, appropriate screenings, staying physically and mentally active, maintaining social connections, and proper nutrition are important aspects of healthy aging. Some medications may affect older adults differently, making medication reviews important. Memory changes that interfere with daily activities should be evaluated by a healthcare provider. For specific concerns about aging-related health issues, please consult with a healthcare provider for personalized guidance."
-    
-    # MEDICATIONS AND TREATMENTS
-    elif any(word in query_lower for word in ['medication', 'drug', 'medicine', 'prescription', 'over-the-counter', 'side effect']):
-        return "Medications play an important role in treating many health conditions. Prescription medications require a healthcare provider's order, while over-the-counter medications are available without a prescription. All medications can have potential side effects and may interact with other medications, supplements, or foods. It's important to take medications as prescribed, inform your healthcare providers of all medications you're taking (including over-the-counter and supplements), and report any concerning side effects. Never stop taking a prescribed medication without consulting your healthcare provider. If you have questions about a specific medication, its use, or potential side effects, please consult with a healthcare provider or pharmacist."
-    
-    # Surgery and procedures
-    elif any(word in query_lower for word in ['surgery', 'operation', 'procedure', 'transplant']):
-        return "Surgical procedures range from minor outpatient procedures to complex operations requiring hospital stays. Before surgery, your healthcare team will explain the procedure, potential risks and benefits, and what to expect during recovery. Following pre-surgical instructions (like fasting or medication adjustments) is important for safety. After surgery, proper wound care, activity restrictions, and follow-up appointments help ensure good outcomes. Pain management and watching for signs of complications (like infection) are also important during recovery. If you have questions about a specific surgical procedure or are experiencing issues after surgery, please consult with your healthcare provider for personalized guidance."
-    
-    # MISCELLANEOUS HEALTH TOPICS
-    # Allergies
-    elif any(word in query_lower for word in ['allergy', 'allergic', 'allergen', 'hay fever']):
-        return "Allergies occur when the immune system reacts to substances (allergens) that are typically harmless. Common allergens include pollen, dust mites, pet dander, certain foods, insect stings, and medications. Symptoms can range from mild (sneezing, runny nose, itchy eyes) to severe (difficulty breathing, anaphylaxis). Management strategies include avoiding triggers, over-the-counter or prescription medications, and in some cases, immunotherapy (allergy shots). For food allergies, careful label reading and carrying emergency medication for severe reactions is important. If you experience concerning allergy symptoms or suspect a new allergy, please consult a healthcare provider for proper evaluation and treatment recommendations."
-    
-    # Infectious diseases
-    elif any(word in query_lower for word in ['infection', 'infectious', 'virus', 'bacteria', 'fungal', 'parasite', 'covid', 'flu', 'pneumonia', 'tuberculosis', 'hiv', 'hepatitis']):
-        return "Infectious diseases are caused by organisms like viruses, bacteria, fungi, or parasites. They can spread through various routes including person-to-person contact, insect bites, contaminated food or water, or environmental exposure. Common infectious diseases include colds, flu, COVID-19, urinary tract infections, and foodborne illnesses. Prevention strategies include good hygiene practices, vaccinations, safe food handling, and avoiding contact with individuals who are ill. Treatment depends on the specific pathogen but may include antibiotics (for bacterial infections), antivirals, or supportive care. If you experience symptoms of infection like fever, unusual fatigue, or localized symptoms, please consult a healthcare provider for proper evaluation and treatment."
-    
-    # First aid
-    elif any(word in query_lower for word in ['first aid', 'emergency', 'cpr', 'bleeding', 'burn', 'fracture', 'sprain', 'wound', 'injury']):
-        return "First aid knowledge is valuable for handling emergencies until professional help arrives. For bleeding, apply direct pressure with clean material. For burns, cool with room temperature water and cover with clean, dry bandage. For suspected fractures, immobilize the area without attempting to realign bones. For choking, perform abdominal thrusts (Heimlich maneuver). For cardiac arrest, perform CPR if trained. Always call emergency services for serious injuries or medical emergencies. Taking a certified first aid and CPR course is recommended. This general information is not a substitute for emergency medical care. For any serious injury or medical emergency, please seek professional medical help immediately."
+    topic = find_medical_topic(query)
+    if topic is None:
+        return None
+    return topic['response']
 
 
 if __name__ == '__main__':
@@ -0,0 +1,251 @@
+"""
+MediMate Voice Assistant - Async (ASGI) Application
+Serves the same routes and JSON as app.py, but upstream Heygen calls are
+awaited instead of holding a worker thread. Run it with:
+
+    hypercorn asgi_app:asgi_app --bind 0.0.0.0:5000
+"""
+import asyncio
+import math
+import time
+from itertools import islice
+
+import httpx
+from quart import Quart, Response, g, render_template, request, jsonify
+
+from app import (
+    AVATAR_CATALOG,
+    BATCH_CHUNK_SIZE,
+    CHECK_QUERY_CACHE,
+    CHECK_QUERY_LIMITER,
+    CONFIG_MAX_AGE,
+    CREATE_TOKEN_LIMITER,
+    HEYGEN_API_BASE_URL,
+    HEYGEN_API_KEY,
+    HEYGEN_CONNECT_TIMEOUT,
+    HEYGEN_MAX_RETRIES,
+    HEYGEN_POOL_SIZE,
+    HEYGEN_READ_TIMEOUT,
+    NDJSON_MIMETYPES,
+    PORT,
+    PROFILE_DIR,
+    PROFILE_MAX_FILES,
+    PROFILE_TOKEN,
+    REGISTRY,
+    REQUEST_SECONDS,
+    TOKEN_POOL,
+    UPSTREAM_CONCURRENCY,
+    UPSTREAM_QUEUE_SIZE,
+    UPSTREAM_QUEUE_TIMEOUT,
+    batch_lines,
+    catalog_document,
+    check_batch_item,
+    check_query_payload,
+    client_id,
+    config_body,
+    get_batch_executor,
+    record_upstream_call,
+)
+from admission import AdmissionRejected, AsyncConcurrencyLimiter
+from batch import ordered_map, parse_ndjson
+from cache import make_etag
+from heygen_client import AsyncHeygenClient, CircuitOpenError
+from profiler import SamplingProfiler, profile_requested, save_profile
+from sse import answer_events
+
+# Initialize Quart app (index.html lives next to this file)
+asgi_app = Quart(__name__, template_folder='.')
+
+# Created once the event loop is running (see start_heygen_client)
+heygen_client = None
+
+# Mint shared by every create_token request that misses the token pool
+_pending_mint = None
+
+# create_token requests waiting on a mint; the rate limiters are shared with app.py
+UPSTREAM_LIMITER = AsyncConcurrencyLimiter(
+    UPSTREAM_CONCURRENCY,
+    queue_size=UPSTREAM_QUEUE_SIZE,
+    queue_timeout=UPSTREAM_QUEUE_TIMEOUT
+)
+
+# Rendered main page: (catalog version, body, etag)
+_index_page = None
+
+@asgi_app.before_serving
+async def start_heygen_client():
+    global heygen_client
+    heygen_client = AsyncHeygenClient(
+        HEYGEN_API_KEY,
+        HEYGEN_API_BASE_URL,
+        pool_size=HEYGEN_POOL_SIZE,
+        connect_timeout=HEYGEN_CONNECT_TIMEOUT,
+        read_timeout=HEYGEN_READ_TIMEOUT,
+        max_retries=HEYGEN_MAX_RETRIES,
+        on_call=record_upstream_call
+    )
+
+@asgi_app.after_serving
+async def stop_heygen_client():
+    await heygen_client.aclose()
+
+@asgi_app.before_request
+async def start_request_timer():
+    g.request_started = time.perf_counter()
+    if profile_requested(request.headers.get('X-Profile'), PROFILE_TOKEN):
+        # Samples the event loop thread, so concurrent requests show up too
+        g.profiler = SamplingProfiler().start()
+
+@asgi_app.after_request
+async def record_request(response):
+    """Observe the request duration, and save its profile if one was taken."""
+    route = request.url_rule.rule if request.url_rule else '<unmatched>'
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        response.headers['X-Profile-Id'] = save_profile(PROFILE_DIR, route, profiler.stop(), PROFILE_MAX_FILES)
+    REQUEST_SECONDS.observe(time.perf_counter() - g.request_started,
+                            route, request.method, str(response.status_code))
+    return response
+
+@asgi_app.errorhandler(AdmissionRejected)
+async def admission_rejected(e):
+    """Shed requests get 429 and a whole-second Retry-After."""
+    retry_after = str(max(1, math.ceil(e.retry_after)))
+    return jsonify({"error": str(e), "reason": e.reason}), 429, {'Retry-After': retry_after}
+
+async def mint_streaming_token():
+    """Mint a token upstream; concurrent callers share one in-flight call and its token."""
+    global _pending_mint
+    if _pending_mint is None:
+        _pending_mint = asyncio.ensure_future(heygen_client.create_streaming_token())
+        _pending_mint.add_done_callback(_clear_pending_mint)
+    # Shield so one cancelled request does not cancel the mint for the rest
+    return await asyncio.shield(_pending_mint)
+
+def _clear_pending_mint(future):
+    global _pending_mint
+    if _pending_mint is future:
+        _pending_mint = None
+
+def conditional_response(body, etag, mimetype, cache_control):
+    """Send body with a strong ETag, or an empty 304 if the client already has it."""
+    if request.if_none_match.contains(etag):
+        response = Response(b'', status=304)
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+@asgi_app.route('/')
+async def index():
+    """Render the main page."""
+    global _index_page
+    AVATAR_CATALOG.maybe_reload()
+    if _index_page is None or _index_page[0] != AVATAR_CATALOG.version:
+        body = (await render_template('index.html', avatars=AVATAR_CATALOG.avatars)).encode()
+        _index_page = (AVATAR_CATALOG.version, body, make_etag(body))
+    return conditional_response(_index_page[1], _index_page[2], 'text/html', 'no-cache')
+
+@asgi_app.route('/api/create_token', methods=['POST'])
+async def create_token():
+    """Create a session token for Heygen Streaming API."""
+    CREATE_TOKEN_LIMITER.acquire(client_id(request))
+    payload = TOKEN_POOL.try_acquire()
+    if payload is not None:
+        return jsonify(payload)
+    try:
+        async with UPSTREAM_LIMITER.slot():
+            return jsonify(await mint_streaming_token())
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        return jsonify({"error": str(e)}), 500
+
+@asgi_app.route('/api/token_pool', methods=['GET'])
+async def token_pool_stats():
+    """Return token pool hit/miss and refill latency statistics."""
+    return jsonify(TOKEN_POOL.stats())
+
+@asgi_app.route('/api/admission', methods=['GET'])
+async def admission_stats():
+    """Return admitted, queued and shed request counts."""
+    return jsonify({
+        'create_token': CREATE_TOKEN_LIMITER.stats(),
+        'check_query': CHECK_QUERY_LIMITER.stats(),
+        'upstream': UPSTREAM_LIMITER.stats(),
+    })
+
+@asgi_app.route('/api/check_query', methods=['POST'])
+async def check_query():
+    """Check if a query is medical-related and generate a response."""
+    CHECK_QUERY_LIMITER.acquire(client_id(request))
+    data = await request.get_json()
+    query_text = data.get('text', '')
+    return jsonify(check_query_payload(query_text))
+
+@asgi_app.route('/api/check_query/stream', methods=['POST'])
+async def check_query_stream():
+    """Like check_query, but streams the response as Server-Sent Events."""
+    CHECK_QUERY_LIMITER.acquire(client_id(request))
+    data = await request.get_json()
+    query_text = data.get('text', '')
+    payload = check_query_payload(query_text)
+
+    async def events():
+        for event in answer_events(payload):
+            yield event.encode()
+
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.timeout = None
+    return response
+
+@asgi_app.route('/api/check_query/batch', methods=['POST'])
+async def check_query_batch():
+    """Check many queries, streaming back one NDJSON result per item in order.
+
+    Unlike app.py the body is read whole before the first item is checked.
+    The checks run in a worker thread, BATCH_CHUNK_SIZE results at a time,
+    so a large batch never blocks the event loop.
+    """
+    CHECK_QUERY_LIMITER.acquire(client_id(request))
+    if request.mimetype in NDJSON_MIMETYPES:
+        items = parse_ndjson((await request.get_data()).splitlines())
+    else:
+        items = await request.get_json(silent=True)
+        if not isinstance(items, list):
+            return jsonify({"error": "Expected a JSON array or an NDJSON body"}), 400
+
+    lines = batch_lines(ordered_map(check_batch_item, items, get_batch_executor(), BATCH_CHUNK_SIZE))
+
+    async def chunks():
+        while True:
+            chunk = await asyncio.to_thread(lambda: ''.join(islice(lines, BATCH_CHUNK_SIZE)))
+            if not chunk:
+                return
+            yield chunk.encode()
+
+    response = Response(chunks(), mimetype='application/x-ndjson')
+    response.timeout = None
+    return response
+
+@asgi_app.route('/api/check_query/cache', methods=['GET'])
+async def check_query_cache_stats():
+    """Return check_query cache hit rate and eviction statistics."""
+    return jsonify(CHECK_QUERY_CACHE.stats())
+
+@asgi_app.route('/metrics', methods=['GET'])
+async def metrics():
+    """Return request, classifier, responder and upstream metrics for Prometheus."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@asgi_app.route('/api/config', methods=['GET'])
+async def get_config():
+    """Return application configuration for the frontend."""
+    body, etag = catalog_document('config', config_body)
+    return conditional_response(body, etag, 'application/json', f'public, max-age={CONFIG_MAX_AGE}')
+
+
+if __name__ == '__main__':
+    print(f"Starting MediMate async application on port {PORT}...")
+    asgi_app.run(host='0.0.0.0', port=PORT)
@@ -1,44 +1,199 @@
+"""
+MediMate avatar catalog.
+Run as a script to refresh the local snapshot of avatars Heygen offers:
+
+    python avatars.py                  # refresh once
+    python avatars.py --interval 3600  # keep refreshing every hour
+    python avatars.py --include ID     # also list a Heygen avatar not in DEFAULT_AVATARS
+
+Only the curated DEFAULT_AVATARS are listed unless others are asked for:
+Heygen returns its whole public stock catalog, mostly non-medical avatars.
+
+The app reads the snapshot through AvatarCatalog, so it never waits on
+Heygen at startup and picks up a new snapshot without a restart.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import namedtuple
+
 import requests
+from dotenv import load_dotenv
+
+from heygen_client import HeygenClient
+
+logger = logging.getLogger(__name__)
+
+# Default snapshot location, next to the app
+AVATAR_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'avatar_catalog.json')
+
+# Icon for avatars included from Heygen that are not in DEFAULT_AVATARS
+DEFAULT_AVATAR_ICON = 'fas fa-user'
+
+# Known avatars with display names and icons (these should match what Heygen provides).
+# Served as-is until a snapshot exists.
+DEFAULT_AVATARS = [
+    {'id': 'Wayne_20240711', 'name': 'Male Doctor', 'icon': 'fas fa-user-md'},
+    {'id': 'Onat_1731911456', 'name': 'Female Doctor', 'icon': 'fas fa-user-nurse'},
+    {'id': '1732832799', 'name': 'Cardiologist', 'icon': 'fas fa-heartbeat'},
+    {'id': '84a12ccb99774fd29bcb27727a9d38ed', 'name': 'Pediatrician', 'icon': 'fas fa-child'},
+    {'id': 'Michael_20240415', 'name': 'Neurologist', 'icon': 'fas fa-brain'},
+    {'id': 'Emily_20240320', 'name': 'Pharmacist', 'icon': 'fas fa-pills'}
+]
+
+
+def merge_avatars(heygen_avatars, known=DEFAULT_AVATARS, include=(), include_all=False):
+    """Build the app's avatar list from what Heygen currently offers.
+
+    Known avatars keep their display name and icon and come first; avatars
+    Heygen no longer offers are dropped. Other avatars Heygen offers are
+    only appended if their ID is in include, or for include_all.
+    """
+    offered = {}
+    for avatar in heygen_avatars:
+        avatar_id = avatar.get('avatar_id')
+        if avatar_id and avatar_id not in offered:
+            offered[avatar_id] = avatar.get('avatar_name') or avatar_id
+    merged = [dict(avatar) for avatar in known if avatar['id'] in offered]
+    known_ids = {avatar['id'] for avatar in known}
+    include = set(include)
+    merged.extend(
+        {'id': avatar_id, 'name': name, 'icon': DEFAULT_AVATAR_ICON}
+        for avatar_id, name in offered.items()
+        if avatar_id not in known_ids and (include_all or avatar_id in include)
+    )
+    return merged
+
+
+def fetch_avatars(client):
+    """Fetch the raw avatar list from Heygen."""
+    data = client.list_avatars()
+    # Heygen nests the list under "data"; older responses had it at the top level
+    return (data.get("data") or data).get("avatars") or []
 
-# Define your API key
-API_KEY = "YzkzZTkwY2U0NTBlNDFmOWFmNjA5MGJmMGRjMDg2YWUtMTc0MDgzMzk5Ng=="
 
-# Set the API endpoint URL
-API_URL = "https://api.heygen.com/v2/avatars"
+def write_snapshot(avatars, path=AVATAR_SNAPSHOT_PATH):
+    """Atomically replace the snapshot file so readers never see a partial write."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.avatar_catalog.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'fetched_at': time.time(), 'avatars': avatars}, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
-# Set the headers, including the API key
-headers = {
-    "Content-Type": "application/json",
-    "X-Api-Key": API_KEY
-}
 
-try:
-    # Make the API request
-    response = requests.get(API_URL, headers=headers)
+def read_snapshot(path=AVATAR_SNAPSHOT_PATH):
+    """Return the avatar list stored in a snapshot file."""
+    with open(path) as f:
+        avatars = json.load(f)['avatars']
+    if not isinstance(avatars, list) or not all(isinstance(a, dict) and a.get('id') for a in avatars):
+        raise ValueError(f"malformed avatar snapshot: {path}")
+    return avatars
 
-    # Print full response for debugging
-    print("\nFull API Response:")
-    print(response.text)
 
-    print("Full Response JSON:", response.json())  # Add this before checking "avatars"
+_CatalogState = namedtuple('_CatalogState', ['avatars', 'version', 'mtime'])
 
-    # Check if the request was successful
-    if response.status_code == 200:
-        data = response.json()
 
-        # Check if avatars are present in the response
-        
-        if "avatars" in data and data["avatars"]:
-            print("\nAvailable Avatars:")
-            for avatar in data["avatars"]:
-                print(f"Avatar ID: {avatar['avatar_id']}")
-                print(f"Avatar Name: {avatar['avatar_name']}")
+class AvatarCatalog:
+    """The avatar list served by the app, backed by the snapshot file.
+
+    Reads are lock-free: a reload builds a new state and swaps it in whole.
+    version changes whenever the list does, so callers can key
+    pre-serialized responses on it.
+    """
+
+    def __init__(self, path=AVATAR_SNAPSHOT_PATH, fallback=DEFAULT_AVATARS, reload_interval=30.0,
+                 clock=time.monotonic):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.clock = clock
+        self._state = self._make_state(fallback, None)
+        self._next_check = 0.0
+        self.maybe_reload()
+
+    @property
+    def avatars(self):
+        return self._state.avatars
+
+    @property
+    def version(self):
+        return self._state.version
+
+    def maybe_reload(self):
+        """Reload the snapshot if it changed, checking at most every reload_interval seconds."""
+        now = self.clock()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._state.mtime:
+            return
+        try:
+            avatars = read_snapshot(self.path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Keeping current avatar list; could not read %s: %s", self.path, e)
+            return
+        self._state = self._make_state(avatars, mtime)
+
+    @staticmethod
+    def _make_state(avatars, mtime):
+        encoded = json.dumps(avatars, sort_keys=True).encode()
+        return _CatalogState(tuple(avatars), hashlib.sha256(encoded).hexdigest()[:16], mtime)
+
+
+def refresh(client, path=AVATAR_SNAPSHOT_PATH, include=(), include_all=False):
+    """Fetch the catalog from Heygen and write a new snapshot; return the avatar list."""
+    avatars = merge_avatars(fetch_avatars(client), include=include, include_all=include_all)
+    if not avatars:
+        raise ValueError("Heygen returned no usable avatars; keeping the existing snapshot")
+    write_snapshot(avatars, path)
+    return avatars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--snapshot', default=AVATAR_SNAPSHOT_PATH, help='snapshot file to write')
+    parser.add_argument('--interval', type=float, default=0, help='seconds between refreshes; 0 refreshes once')
+    parser.add_argument('--include', nargs='+', default=[], metavar='ID',
+                        help='Heygen avatar IDs to list besides DEFAULT_AVATARS')
+    parser.add_argument('--include-all', action='store_true',
+                        help="list every avatar Heygen offers (the whole stock catalog)")
+    args = parser.parse_args()
+
+    # Load the API key from the environment (.env) rather than hardcoding it
+    load_dotenv()
+    client = HeygenClient(
+        os.getenv('HEYGEN_API_KEY'),
+        os.getenv('HEYGEN_API_BASE_URL', 'https://api.heygen.com')
+    )
+
+    while True:
+        try:
+            avatars = refresh(client, args.snapshot, args.include, args.include_all)
+            print(f"\nWrote {len(avatars)} avatars to {args.snapshot}:")
+            for avatar in avatars:
+                print(f"Avatar ID: {avatar['id']}")
+                print(f"Avatar Name: {avatar['name']}")
                 print("----------------------------")
-        else:
-            print("No avatars found in the response.")
+        except requests.exceptions.HTTPError as e:
+            print(f"Error: Unable to fetch avatars (Status Code: {e.response.status_code})")
+        except Exception as e:
+            print(f"An error occurred: {e}")
+
+        if not args.interval:
+            break
+        time.sleep(args.interval)
 
-    else:
-        print(f"Error: Unable to fetch avatars (Status Code: {response.status_code})")
 
-except Exception as e:
-    print(f"An error occurred: {e}")
+if __name__ == '__main__':
+    main()
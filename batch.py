@@ -0,0 +1,65 @@
+"""
+Batch helpers for MediMate.
+Streams many queries through a function in input order, optionally spread
+over a process pool, without holding the whole batch in memory.
+"""
+import json
+from collections import deque
+from itertools import islice
+
+
+def parse_ndjson(lines):
+    """Yield one decoded item per non-blank NDJSON line.
+
+    A line that is not valid JSON yields a ValueError instance in its place so
+    the caller can report it without losing its position in the stream.
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"invalid JSON: {e}")
+
+
+def item_text(item):
+    """Return the query text of a batch item: a string or {"text": ...}."""
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict) and isinstance(item.get('text', ''), str):
+        return item.get('text', '')
+    raise ValueError("each item must be a string or an object with a 'text' string")
+
+
+def _apply_chunk(func, chunk):
+    """Run func over one chunk; module level so process pools can pickle it."""
+    return [func(item) for item in chunk]
+
+
+def ordered_map(func, items, executor=None, chunk_size=64, max_pending=8):
+    """Yield func(item) for every item, in input order.
+
+    Without an executor the work runs inline. With one, items are submitted
+    in chunks and at most max_pending chunks are in flight, so memory stays
+    bounded however long the input is.
+    """
+    items = iter(items)
+    if executor is None:
+        for item in items:
+            yield func(item)
+        return
+
+    pending = deque()
+    while True:
+        while len(pending) < max_pending:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                break
+            pending.append(executor.submit(_apply_chunk, func, chunk))
+        if not pending:
+            return
+        yield from pending.popleft().result()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark: compiled KeywordMatcher vs. the original per-keyword substring loop.
+
+Usage:
+    python benchmarks/bench_matcher.py
+
+Times a non-matching query (the worst case for both approaches) while growing
+the keyword list and the input length.
+"""
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge import read_knowledge  # noqa: E402
+from matcher import KeywordMatcher  # noqa: E402
+
+MEDICAL_KEYWORDS = read_knowledge()['keywords']
+
+KEYWORD_COUNTS = [50, 150, len(MEDICAL_KEYWORDS), 1000, 3000]
+INPUT_LENGTHS = [40, 200, 1000, 5000]
+FILLER_WORDS = ['please', 'tell', 'about', 'the', 'weather', 'today', 'and',
+                'tomorrow', 'what', 'time', 'is', 'it', 'in', 'paris', 'now']
+
+
+def legacy_is_match(keywords, text):
+    """The loop that is_medical_query used before the compiled matcher."""
+    text_lower = text.lower()
+    for keyword in keywords:
+        if keyword in text_lower:
+            return True
+    return False
+
+
+def make_keywords(count, rng):
+    """Real medical keywords, padded with synthetic ones that never match."""
+    keywords = list(dict.fromkeys(MEDICAL_KEYWORDS))[:count]
+    while len(keywords) < count:
+        keywords.append('zq' + ''.join(rng.choice(string.ascii_lowercase) for _ in range(8)))
+    return keywords
+
+
+def make_text(length, rng):
+    """Non-medical filler text of roughly the given length."""
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(rng.choice(FILLER_WORDS))
+    return ' '.join(words)
+
+
+def best_of(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'keywords':>8} {'chars':>6} {'legacy us':>10} {'compiled us':>12} {'speedup':>8}")
+    for count in KEYWORD_COUNTS:
+        keywords = make_keywords(count, rng)
+        matcher = KeywordMatcher(keywords)
+        for length in INPUT_LENGTHS:
+            text = make_text(length, rng)
+            assert not matcher.matches(text)
+            number = max(10, 20000 // (count * max(1, length // 200)))
+            legacy = best_of(lambda: legacy_is_match(keywords, text), number)
+            compiled = best_of(lambda: matcher.matches(text), number)
+            print(f"{count:>8} {len(text):>6} {legacy:>10.2f} {compiled:>12.2f} {legacy / compiled:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Micro-benchmarks for the classifier and responder.
+
+Usage:
+    python benchmarks/bench_responder.py [--output results.json]
+
+Times is_medical_query, generate_medical_response and the full (uncached)
+check_query body over the fixed corpus in queries.txt, plus worst-case
+inputs that match nothing. The misspelled queries in misspelled.txt measure
+the spelling-tolerant fallback, with the fuzzy index's token cache both warm
+and disabled; exact_match/corpus is the keyword scan alone, for reference.
+Prints JSON; compare two runs with compare.py.
+"""
+import argparse
+import os
+import sys
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+# Measure the real work, not cache hits
+os.environ['CHECK_QUERY_CACHE_SIZE'] = '0'
+
+import app  # noqa: E402
+from fuzzy import FuzzyIndex  # noqa: E402
+from knowledge import read_word_list  # noqa: E402
+from matcher import KEYWORD_SUFFIXES  # noqa: E402
+from harness import load_queries, run_metadata, write_report  # noqa: E402
+
+# Filler that contains no medical keyword, but plenty of near-misses
+# ("year" holds "ear", "items" holds "ms", "weather" holds "eat")
+NON_MEDICAL_WORDS = ['please', 'tell', 'me', 'about', 'the', 'weather', 'this', 'year',
+                     'list', 'items', 'in', 'my', 'cart', 'and', 'book', 'a', 'flight']
+
+
+def non_medical_text(length):
+    words = []
+    i = 0
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(NON_MEDICAL_WORDS[i % len(NON_MEDICAL_WORDS)])
+        i += 1
+    return ' '.join(words)
+
+
+def per_query_ns(func, queries, repeat=5, min_time=0.2):
+    """Best-of-repeat mean time per query, in nanoseconds."""
+    def run():
+        for query in queries:
+            func(query)
+
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number / len(queries) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_queries()
+    misspelled = load_queries(os.path.join(BENCH_DIR, 'misspelled.txt'))
+    knowledge = app.KNOWLEDGE.current()
+    fuzzy_cold = FuzzyIndex(
+        knowledge.fuzzy_index.words,
+        max_distance=knowledge.fuzzy_index.max_distance,
+        min_length=knowledge.fuzzy_index.min_length,
+        exclude=knowledge.fuzzy_excluded_words,
+        suffixes=KEYWORD_SUFFIXES,
+        common_words=read_word_list(),
+        cache_size=0
+    )
+    medical = [q for q in corpus if app.is_medical_query(q)]
+    non_medical = [q for q in corpus if not app.is_medical_query(q)]
+    worst_cases = {
+        'no_match_40': [non_medical_text(40)],
+        'no_match_1k': [non_medical_text(1000)],
+        'no_match_10k': [non_medical_text(10000)],
+    }
+
+    cases = {
+        'exact_match/corpus': (knowledge.matcher.matches, corpus),
+        'is_medical_query/corpus': (app.is_medical_query, corpus),
+        'is_medical_query/misspelled': (app.is_medical_query, misspelled),
+        'generate_medical_response/misspelled': (app.generate_medical_response, misspelled),
+        'fuzzy_correct/misspelled': (knowledge.fuzzy_index.correct, misspelled),
+        'fuzzy_correct_uncached/misspelled': (fuzzy_cold.correct, misspelled),
+        'is_medical_query/non_medical': (app.is_medical_query, non_medical),
+        'generate_medical_response/medical': (app.generate_medical_response, medical),
+        'check_query_payload/corpus': (app.check_query_payload, corpus),
+    }
+    for name, queries in worst_cases.items():
+        cases[f'is_medical_query/{name}'] = (app.is_medical_query, queries)
+        cases[f'generate_medical_response/{name}'] = (app.generate_medical_response, queries)
+
+    results = {}
+    for name, (func, queries) in cases.items():
+        results[name] = {
+            'queries': len(queries),
+            'ns_per_query': round(per_query_ns(func, queries, args.repeat)),
+        }
+
+    write_report({'benchmark': 'responder', 'meta': run_metadata(), 'results': results}, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Time-to-first-chunk of /api/check_query/stream against /api/check_query.
+
+Usage:
+    python benchmarks/bench_stream.py --server sync --requests 200 --output stream.json
+
+Serves the app in a separate process (as load_test.py does), then sends
+each query in queries.txt to both endpoints one at a time and measures:
+
+    json.total_ms          full /api/check_query response
+    stream.first_chunk_ms  first "chunk" event of the streamed answer
+    stream.done_ms         final "done" event
+
+The response cache is off by default so every request is classified.
+Fails (exit status 1) if a streamed answer does not reassemble into the
+same body as /api/check_query. Compare two runs with compare.py.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import (  # noqa: E402
+    free_port,
+    load_queries,
+    percentile,
+    run_metadata,
+    start_server,
+    stop_server,
+    write_report,
+)
+
+
+def read_events(response):
+    """Yield (event, data, seconds since the request started) per SSE event."""
+    event, data = None, []
+    for line in response.iter_lines():
+        if line.startswith('event:'):
+            event = line[6:].strip()
+        elif line.startswith('data:'):
+            data.append(line[5:].strip())
+        elif not line and event is not None:
+            yield event, json.loads('\n'.join(data))
+            event, data = None, []
+
+
+def measure(client, query):
+    """Return (json seconds, first chunk seconds, done seconds, body, chunks)."""
+    started = time.perf_counter()
+    body = client.post('/api/check_query', json={'text': query}).json()
+    json_time = time.perf_counter() - started
+
+    chunks = []
+    first_chunk = done = None
+    started = time.perf_counter()
+    with client.stream('POST', '/api/check_query/stream', json={'text': query}) as response:
+        for event, data in read_events(response):
+            if event == 'chunk':
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - started
+                chunks.append(data['text'])
+            elif event == 'done':
+                done = time.perf_counter() - started
+                streamed = data
+    if first_chunk is None:
+        first_chunk = done
+    return json_time, first_chunk, done, body, streamed, chunks
+
+
+def summarize(seconds):
+    seconds = sorted(seconds)
+    return {
+        'mean_ms': round(sum(seconds) / len(seconds) * 1000, 3),
+        'p50_ms': round(percentile(seconds, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(seconds, 0.95) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--requests', type=int, default=200, help='queries to send to each endpoint')
+    parser.add_argument('--cache-size', type=int, default=0, help='CHECK_QUERY_CACHE_SIZE for the server')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    queries = load_queries()
+    queries = [queries[i % len(queries)] for i in range(args.requests)]
+    port = free_port()
+    env = {'CHECK_QUERY_CACHE_SIZE': str(args.cache_size), 'TOKEN_POOL_SIZE': '0'}
+    process = start_server(args.server, port, env)
+    json_times, first_chunks, dones, chunk_counts, mismatches = [], [], [], [], []
+    try:
+        with httpx.Client(base_url=f'http://127.0.0.1:{port}', timeout=30) as client:
+            for query in queries:
+                json_time, first_chunk, done, body, streamed, chunks = measure(client, query)
+                json_times.append(json_time)
+                first_chunks.append(first_chunk)
+                dones.append(done)
+                chunk_counts.append(len(chunks))
+                streamed_text = ' '.join(chunks) or None
+                if streamed_text != body['response'] or streamed.get('response') != body['response']:
+                    mismatches.append(query)
+    finally:
+        stop_server(process)
+
+    report = {
+        'benchmark': 'stream',
+        'meta': run_metadata(),
+        'config': {'server': args.server, 'requests': args.requests, 'cache_size': args.cache_size},
+        'chunks_per_answer': round(sum(chunk_counts) / len(chunk_counts), 2),
+        'mismatches': mismatches,
+        'results': {
+            'json.total': summarize(json_times),
+            'stream.first_chunk': summarize(first_chunks),
+            'stream.done': summarize(dones),
+        },
+    }
+    write_report(report, args.output)
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare two benchmark reports written by bench_responder.py or load_test.py.
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 10]
+
+Prints every numeric result side by side with the relative change, and
+exits with status 1 if any latency/time metric got worse by more than
+--threshold percent (or any throughput metric dropped by more than that).
+"""
+import argparse
+import json
+import sys
+
+# Metrics where a higher value is an improvement; all other timings are lower-is-better
+HIGHER_IS_BETTER = ('requests_per_s',)
+COMPARED_SUFFIXES = ('_ms', '_ns', 'ns_per_query', 'requests_per_s')
+
+
+def flatten(results, prefix=''):
+    """Yield (dotted.key, value) for every numeric leaf."""
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, path + '.')
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help='regression threshold in percent')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline.get('meta', {}).get('commit')}  candidate: {candidate.get('meta', {}).get('commit')}")
+    old = dict(flatten(baseline.get('results', {})))
+    new = dict(flatten(candidate.get('results', {})))
+    regressions = []
+    width = max((len(key) for key in old), default=10)
+    for key, before in old.items():
+        if key not in new:
+            continue
+        after = new[key]
+        change = (after - before) / before * 100 if before else 0.0
+        line = f"{key:<{width}}  {before:>12.2f}  {after:>12.2f}  {change:>+7.1f}%"
+        if key.endswith(COMPARED_SUFFIXES):
+            worse = -change if key.endswith(HIGHER_IS_BETTER) else change
+            if worse > args.threshold:
+                regressions.append(key)
+                line += '  REGRESSION'
+        print(line)
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:g}%")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
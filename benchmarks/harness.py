@@ -0,0 +1,131 @@
+"""
+Shared helpers for the MediMate benchmarks.
+
+serve_sync() emulates sync workers (gunicorn --threads) with a fixed thread
+pool; the async app runs under hypercorn. run_metadata() and write_report()
+give every benchmark the same JSON envelope so runs can be compared across
+commits with compare.py.
+"""
+import datetime
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+# Server env that turns off admission control, for benchmarks that drive the
+# app harder than any one real client would
+NO_ADMISSION = {'CREATE_TOKEN_RATE': '0', 'CHECK_QUERY_RATE': '0', 'UPSTREAM_CONCURRENCY': '0'}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve_sync(port, threads):
+    """Serve the Flask app on a fixed-size thread pool (blocks forever)."""
+    from concurrent.futures import ThreadPoolExecutor
+    from werkzeug.serving import BaseWSGIServer
+
+    sys.path.insert(0, ROOT)
+    from app import app
+
+    class PooledWSGIServer(BaseWSGIServer):
+        request_queue_size = 4096
+        executor = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.executor.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    PooledWSGIServer('127.0.0.1', port, app).serve_forever()
+
+
+def start_server(kind, port, env, threads=8):
+    """Start the 'sync' or 'async' app on port; return the Popen once it answers.
+
+    Admission control is off unless env turns it back on.
+    """
+    env = {**os.environ, **NO_ADMISSION, **env}
+    if kind == 'sync':
+        command = [sys.executable, '-c',
+                   f'import sys; sys.path.insert(0, {BENCH_DIR!r}); '
+                   f'from harness import serve_sync; serve_sync({port}, {threads})']
+    elif kind == 'async':
+        command = [sys.executable, '-m', 'hypercorn', 'asgi_app:asgi_app',
+                   '--bind', f'127.0.0.1:{port}', '--backlog', '4096', '--log-level', 'warning']
+    else:
+        raise ValueError(f"unknown server kind: {kind}")
+    process = subprocess.Popen(command, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/api/config', timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{kind} server did not start")
+
+
+def stop_server(process):
+    process.terminate()
+    process.wait()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def load_queries(path=os.path.join(BENCH_DIR, 'queries.txt')):
+    """Return the fixed benchmark query corpus, one query per line."""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def run_metadata():
+    """Describe where a result came from: commit, interpreter and machine."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ''
+    return {
+        'commit': commit or None,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def write_report(report, output=None):
+    """Print the report as JSON, and also save it to output if given."""
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
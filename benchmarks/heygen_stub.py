@@ -0,0 +1,119 @@
+"""
+Local stand-in for the Heygen API, for load tests and manual testing.
+
+Usage:
+    python benchmarks/heygen_stub.py --port 8900 --latency 0.2 --error-rate 0.05
+
+Then point the app at it with HEYGEN_API_BASE_URL=http://127.0.0.1:8900.
+Serves POST /v1/streaming.create_token and GET /v2/avatars.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+AVATARS = [
+    {'avatar_id': 'Wayne_20240711', 'avatar_name': 'Wayne'},
+    {'avatar_id': 'Onat_1731911456', 'avatar_name': 'Onat'},
+    {'avatar_id': 'Michael_20240415', 'avatar_name': 'Michael'},
+]
+
+
+class HeygenStub(ThreadingHTTPServer):
+    """Threaded stub server with injectable latency and 5xx errors."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.calls = {}
+        self._calls_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, path):
+        with self._calls_lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up mid-reply; that is expected here
+        pass
+
+    def start(self):
+        """Serve on a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Buffer writes so headers and body leave in one segment (no Nagle stall)
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _simulate(self):
+        """Apply configured latency; return True if this call should fail."""
+        server = self.server
+        server.count(self.path)
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+        if server.error_rate and random.random() < server.error_rate:
+            self._reply(server.error_status, {'error': 'stub failure'})
+            return True
+        return False
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        if self.path != '/v1/streaming.create_token':
+            return self._reply(404, {'error': 'not found'})
+        if self._simulate():
+            return
+        self._reply(200, {'error': None, 'data': {'token': uuid.uuid4().hex}})
+
+    def do_GET(self):
+        if self.path != '/v2/avatars':
+            return self._reply(404, {'error': 'not found'})
+        if self._simulate():
+            return
+        self._reply(200, {'error': None, 'data': {'avatars': AVATARS}})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every call')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random seconds, 0..jitter')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of calls answered with a 5xx')
+    parser.add_argument('--error-status', type=int, default=503)
+    args = parser.parse_args()
+    server = HeygenStub((args.host, args.port), args.latency, args.jitter, args.error_rate, args.error_status)
+    print(f"Heygen stub listening on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Admission control under overload, against the local Heygen stub.
+
+Usage:
+    python benchmarks/load_admission.py --server sync --latency 0.5 --output admission.json
+
+Serves the app with small admission limits and TRUST_X_FORWARDED_FOR set,
+so each simulated client is just a different X-Forwarded-For address:
+
+    rate_limit     one client sends more check_query and create_token
+                   requests than its burst; the extra ones get 429 while a
+                   second client is still served
+    load_shedding  many clients ask for a token at once while every mint
+                   takes --latency; requests beyond the concurrency cap and
+                   wait queue get 429 right away instead of waiting
+
+Every 429 must carry a Retry-After header, and shed requests must be
+answered well before one upstream round trip. Fails (exit status 1) if any
+expectation does not hold; the failures are listed in the report.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from heygen_stub import HeygenStub  # noqa: E402
+from harness import (  # noqa: E402
+    free_port,
+    percentile,
+    run_metadata,
+    start_server,
+    stop_server,
+    write_report,
+)
+
+CREATE_TOKEN = '/api/create_token'
+CREATE_TOKEN_PATH = '/v1/streaming.create_token'
+
+
+def summarize(seconds):
+    seconds = sorted(seconds)
+    if not seconds:
+        return None
+    return {
+        'count': len(seconds),
+        'p50_ms': round(percentile(seconds, 0.50) * 1000, 1),
+        'max_ms': round(seconds[-1] * 1000, 1),
+    }
+
+
+async def post(client, path, address, **kwargs):
+    """POST as the client at address; return (response, seconds)."""
+    started = time.perf_counter()
+    response = await client.post(path, headers={'X-Forwarded-For': address}, **kwargs)
+    return response, time.perf_counter() - started
+
+
+def check_rejections(responses, failures, label):
+    """Every 429 must say why and when to come back."""
+    for response in responses:
+        if response.status_code != 429:
+            continue
+        retry_after = response.headers.get('Retry-After', '')
+        if not retry_after.isdigit() or int(retry_after) < 1:
+            failures.append(f"{label}: 429 without a valid Retry-After ({retry_after!r})")
+            return
+        if 'reason' not in response.json():
+            failures.append(f"{label}: 429 body has no reason")
+            return
+
+
+async def rate_limit(client, args, failures):
+    """One client goes over its burst on both routes; another is unaffected."""
+    results = {}
+    for route, burst, body in (('check_query', args.check_query_burst, {'json': {'text': 'I have a headache'}}),
+                               ('create_token', args.create_token_burst, {})):
+        path = '/api/check_query' if route == 'check_query' else CREATE_TOKEN
+        responses = [(await post(client, path, '10.0.0.1', **body))[0] for _ in range(burst + 3)]
+        statuses = [response.status_code for response in responses]
+        other, _ = await post(client, path, '10.0.0.2', **body)
+        results[route] = {
+            'ok': statuses.count(200),
+            'rate_limited': statuses.count(429),
+            'retry_after': sorted({response.headers.get('Retry-After') for response in responses
+                                   if response.status_code == 429}),
+            'other_client_status': other.status_code,
+        }
+        if statuses != [200] * burst + [429] * 3:
+            failures.append(f"rate_limit {route}: expected {burst} x 200 then 3 x 429, got {statuses}")
+        if other.status_code != 200:
+            failures.append(f"rate_limit {route}: a second client got {other.status_code}")
+        check_rejections(responses, failures, f"rate_limit {route}")
+    return results
+
+
+async def load_shedding(client, args, stub, failures):
+    """Fire one create_token per client at once while the upstream is slow."""
+    calls_before = stub.calls.get(CREATE_TOKEN_PATH, 0)
+    results = await asyncio.gather(*[
+        post(client, CREATE_TOKEN, f'10.1.{i // 256}.{i % 256}') for i in range(args.clients)])
+    responses = [response for response, _ in results]
+    ok = [seconds for response, seconds in results if response.status_code == 200]
+    shed = [seconds for response, seconds in results if response.status_code == 429]
+    other = sorted({response.status_code for response in responses} - {200, 429})
+    admission = (await client.get('/api/admission')).json()['upstream']
+    report = {
+        'clients': args.clients,
+        'ok': summarize(ok),
+        'shed': summarize(shed),
+        'other_statuses': other,
+        'upstream_calls': stub.calls.get(CREATE_TOKEN_PATH, 0) - calls_before,
+        'admission': admission,
+    }
+
+    capacity = args.concurrency + args.queue_size
+    if other:
+        failures.append(f"load_shedding: unexpected statuses {other}")
+    if len(ok) < args.concurrency:
+        failures.append(f"load_shedding: only {len(ok)} requests served, cap is {args.concurrency}")
+    if args.clients > capacity and not shed:
+        failures.append(f"load_shedding: {args.clients} requests for {capacity} places and none shed")
+    if shed and percentile(sorted(shed), 0.95) >= args.latency:
+        failures.append("load_shedding: shed requests waited as long as an upstream call")
+    if admission['shed_queue_full'] + admission['shed_queue_timeout'] != len(shed):
+        failures.append(f"load_shedding: /api/admission counts {admission} do not match {len(shed)} shed")
+    if admission['in_flight'] or admission['waiting']:
+        failures.append(f"load_shedding: slots still held after the burst: {admission}")
+    check_rejections(responses, failures, 'load_shedding')
+    return report
+
+
+async def run(base_url, args, stub):
+    failures = []
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        results = {
+            'rate_limit': await rate_limit(client, args, failures),
+            'load_shedding': await load_shedding(client, args, stub, failures),
+        }
+    return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--latency', type=float, default=0.5, help='stub create_token latency (s)')
+    parser.add_argument('--clients', type=int, default=60, help='simultaneous create_token clients')
+    parser.add_argument('--concurrency', type=int, default=4, help='UPSTREAM_CONCURRENCY for the server')
+    parser.add_argument('--queue-size', type=int, default=8, help='UPSTREAM_QUEUE_SIZE for the server')
+    parser.add_argument('--check-query-burst', type=int, default=5)
+    parser.add_argument('--create-token-burst', type=int, default=3)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    stub = HeygenStub(('127.0.0.1', 0), latency=args.latency).start()
+    port = free_port()
+    env = {
+        'HEYGEN_API_BASE_URL': stub.base_url,
+        'HEYGEN_API_KEY': 'stub',
+        'TOKEN_POOL_SIZE': '0',
+        'TRUST_X_FORWARDED_FOR': 'true',
+        # Slow refill, so the rate limit test sees exactly the burst
+        'CHECK_QUERY_RATE': '0.01',
+        'CHECK_QUERY_BURST': str(args.check_query_burst),
+        'CREATE_TOKEN_RATE': '0.01',
+        'CREATE_TOKEN_BURST': str(args.create_token_burst),
+        'UPSTREAM_CONCURRENCY': str(args.concurrency),
+        'UPSTREAM_QUEUE_SIZE': str(args.queue_size),
+        'UPSTREAM_QUEUE_TIMEOUT': str(args.latency * 4),
+    }
+    # Enough worker threads that the sync server's own pool is not the bottleneck
+    process = start_server(args.server, port, env, threads=args.clients + 8)
+    try:
+        results, failures = asyncio.run(run(f'http://127.0.0.1:{port}', args, stub))
+    finally:
+        stop_server(process)
+
+    report = {
+        'benchmark': 'admission',
+        'meta': run_metadata(),
+        'config': {key: getattr(args, key) for key in
+                   ('server', 'latency', 'clients', 'concurrency', 'queue_size')},
+        'failures': failures,
+        'results': results,
+    }
+    write_report(report, args.output)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
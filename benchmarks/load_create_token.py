@@ -0,0 +1,83 @@
+"""
+Load test: concurrent /api/create_token on the sync (WSGI) vs. async (ASGI) app.
+
+Usage:
+    python benchmarks/load_create_token.py --concurrency 1000 --latency 0.5
+
+Starts a local Heygen stub with the given upstream latency, serves each app
+in its own process, fires the requests all at once and reports throughput.
+The sync app runs on a fixed pool of worker threads, like gunicorn --threads;
+the async app runs under hypercorn. The token pool is disabled so every
+request exercises the upstream path.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from heygen_stub import HeygenStub  # noqa: E402
+from harness import free_port, percentile, start_server, stop_server  # noqa: E402
+
+
+async def fire(url, concurrency, timeout):
+    """Send concurrency requests at once; return (ok, errors, elapsed, latencies)."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        async def one():
+            started = time.perf_counter()
+            try:
+                response = await client.post(url)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            return ok, time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[one() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+    latencies = sorted(latency for _, latency in results)
+    ok = sum(1 for success, _ in results if success)
+    return ok, len(results) - ok, elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.5, help='upstream create_token latency (s)')
+    parser.add_argument('--threads', type=int, default=8, help='worker threads for the sync app')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    stub = HeygenStub(('127.0.0.1', 0), latency=args.latency).start()
+    report = {'concurrency': args.concurrency, 'upstream_latency_s': args.latency,
+              'sync_threads': args.threads, 'results': {}}
+    for kind in ('sync', 'async'):
+        port = free_port()
+        env = {'HEYGEN_API_BASE_URL': stub.base_url, 'TOKEN_POOL_SIZE': '0', 'HEYGEN_API_KEY': 'stub'}
+        process = start_server(kind, port, env, args.threads)
+        try:
+            ok, errors, elapsed, latencies = asyncio.run(
+                fire(f'http://127.0.0.1:{port}/api/create_token', args.concurrency, args.timeout))
+        finally:
+            stop_server(process)
+        report['results'][kind] = {
+            'ok': ok,
+            'errors': errors,
+            'elapsed_s': round(elapsed, 3),
+            'requests_per_s': round(args.concurrency / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        }
+    report['speedup'] = round(report['results']['async']['requests_per_s'] /
+                              report['results']['sync']['requests_per_s'], 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+End-to-end load test of all four routes against a local Heygen stand-in.
+
+Usage:
+    python benchmarks/load_test.py --server sync --concurrency 50 --requests 5000 \
+        --latency 0.2 --output results.json
+
+Starts benchmarks/heygen_stub.py with the given upstream latency, serves the
+app in a separate process (sync: fixed thread pool, async: hypercorn), then
+has --concurrency virtual users send a weighted mix of /, /api/config,
+/api/check_query and /api/create_token until --requests have been sent.
+Reports throughput and p50/p95/p99 latency per route as JSON; compare two
+runs with compare.py.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import (  # noqa: E402
+    free_port,
+    load_queries,
+    percentile,
+    run_metadata,
+    start_server,
+    stop_server,
+    write_report,
+)
+from heygen_stub import HeygenStub  # noqa: E402
+
+ROUTES = ('index', 'config', 'check_query', 'create_token')
+DEFAULT_MIX = 'index=1,config=4,check_query=10,create_token=1'
+
+
+def parse_mix(text):
+    """Parse 'route=weight,...' into a {route: weight} dict."""
+    mix = {}
+    for part in text.split(','):
+        route, _, weight = part.partition('=')
+        if route.strip() not in ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown route {route!r}; expected one of {', '.join(ROUTES)}")
+        mix[route.strip()] = float(weight or 1)
+    return mix
+
+
+async def run_load(base_url, mix, concurrency, total, queries, timeout, seed):
+    """Drive the app; return ({route: [(ok, latency)]}, elapsed seconds)."""
+    routes = list(mix)
+    weights = [mix[route] for route in routes]
+    samples = {route: [] for route in routes}
+    remaining = total
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        async def send(route, rng):
+            if route == 'index':
+                return await client.get('/')
+            if route == 'config':
+                return await client.get('/api/config')
+            if route == 'check_query':
+                return await client.post('/api/check_query', json={'text': rng.choice(queries)})
+            return await client.post('/api/create_token')
+
+        async def user(rng):
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                route = rng.choices(routes, weights)[0]
+                started = time.perf_counter()
+                try:
+                    response = await send(route, rng)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                samples[route].append((ok, time.perf_counter() - started))
+
+        started = time.perf_counter()
+        await asyncio.gather(*[user(random.Random(seed + i)) for i in range(concurrency)])
+        elapsed = time.perf_counter() - started
+    return samples, elapsed
+
+
+def summarize(samples, elapsed):
+    """Throughput and latency percentiles for one route (or all of them)."""
+    latencies = sorted(latency for _, latency in samples)
+    errors = sum(1 for ok, _ in samples if not ok)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'requests_per_s': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=('sync', 'async'), default='sync')
+    parser.add_argument('--threads', type=int, default=8, help='worker threads for the sync server')
+    parser.add_argument('--concurrency', type=int, default=50, help='concurrent virtual users')
+    parser.add_argument('--requests', type=int, default=5000, help='total requests to send')
+    parser.add_argument('--latency', type=float, default=0.1, help='stub upstream latency (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random upstream latency (s)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'route weights (default {DEFAULT_MIX})')
+    parser.add_argument('--token-pool-size', type=int, default=2)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    stub = HeygenStub(('127.0.0.1', 0), latency=args.latency, jitter=args.jitter).start()
+    port = free_port()
+    env = {
+        'HEYGEN_API_BASE_URL': stub.base_url,
+        'HEYGEN_API_KEY': 'stub',
+        'TOKEN_POOL_SIZE': str(args.token_pool_size),
+    }
+    process = start_server(args.server, port, env, args.threads)
+    try:
+        samples, elapsed = asyncio.run(run_load(
+            f'http://127.0.0.1:{port}', args.mix, args.concurrency, args.requests,
+            load_queries(), args.timeout, args.seed))
+    finally:
+        stop_server(process)
+
+    all_samples = [sample for route_samples in samples.values() for sample in route_samples]
+    report = {
+        'benchmark': 'load',
+        'meta': run_metadata(),
+        'config': {
+            'server': args.server,
+            'threads': args.threads if args.server == 'sync' else None,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'upstream_latency_s': args.latency,
+            'upstream_jitter_s': args.jitter,
+            'mix': args.mix,
+            'token_pool_size': args.token_pool_size,
+        },
+        'elapsed_s': round(elapsed, 3),
+        'upstream_calls': dict(stub.calls),
+        'results': {'all': summarize(all_samples, elapsed)},
+    }
+    for route, route_samples in samples.items():
+        report['results'][route] = summarize(route_samples, elapsed)
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Response caching for MediMate.
+A small thread-safe LRU cache with optional TTL, used to skip the keyword
+scan and topic lookup for queries that repeat.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Punctuation runs, plus hyphens/apostrophes that are not inside a word
+# ("x-ray" and "men's" keep theirs, "pain?" and "- fever" do not)
+_PUNCTUATION_RE = re.compile(r"[^\w\s'-]+|(?<!\w)['-]+|['-]+(?!\w)")
+
+
+def make_etag(body):
+    """Return a strong ETag value (unquoted) for a response body."""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def normalize_query(text):
+    """Case-fold text and collapse punctuation and whitespace to single spaces."""
+    return ' '.join(_PUNCTUATION_RE.sub(' ', text.casefold()).split())
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with an optional time to live.
+
+    maxsize 0 disables caching. ttl is in seconds; None keeps entries until
+    they are evicted. Call ensure_version() with whatever the cached values
+    were derived from and the cache empties itself when that changes.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._version = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._clears = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self.clock():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        expires_at = self.clock() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._clears += 1
+
+    def ensure_version(self, version):
+        """Clear the cache if version differs from the one it was filled under."""
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                if self._version is not None:
+                    self._clears += 1
+                self._version = version
+
+    def stats(self):
+        """Return size, hit rate and eviction counters as a plain dict."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'clears': self._clears,
+            }
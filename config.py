@@ -4,6 +4,8 @@ Configuration settings for the MediMate application.
 import os
 from dotenv import load_dotenv
 
+from knowledge import read_knowledge
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -22,16 +24,8 @@ AVAILABLE_AVATARS = [
     'specialist_male'
 ]  # These are placeholder names - replace with actual Haygen avatar options
 
-# Medical domain keywords to identify medical queries
-MEDICAL_KEYWORDS = [
-    'health', 'medical', 'doctor', 'hospital', 'symptom', 'pain', 'treatment', 
-    'medicine', 'disease', 'diagnosis', 'prescription', 'dose', 'therapy',
-    'allergy', 'vaccination', 'surgery', 'emergency', 'vaccine', 'drug',
-    'blood', 'heart', 'lung', 'kidney', 'liver', 'brain', 'stomach', 
-    'headache', 'fever', 'cough', 'cold', 'flu', 'covid', 'virus',
-    'bacteria', 'infection', 'inflammation', 'chronic', 'acute',
-    'condition', 'disorder', 'syndrome', 'prevention', 'cure'
-]
+# Medical domain keywords, from the same knowledge file the app loads
+MEDICAL_KEYWORDS = read_knowledge()['keywords']
 
 # Application settings
 DEBUG = os.getenv('DEBUG', 'True').lower() in ('true', '1', 't')
@@ -0,0 +1,79 @@
+"""
+Builds english_words.txt, the common English words fuzzy matching never
+corrects ("career" is not a misspelled "cancer").
+
+The list is derived from the wordfreq package's data, which is licensed
+CC BY-SA 4.0, so it is built at install time rather than shipped with the
+app. Run once after installing the requirements:
+
+    pip install wordfreq
+    python english_words.py                 # words with a Zipf frequency >= 3.0
+    python english_words.py --min-zipf 2.5  # a longer list
+
+Without the file fuzzy matching still works, but may correct ordinary words.
+"""
+import argparse
+import importlib.metadata
+import os
+import tempfile
+
+from knowledge import ENGLISH_WORDS_PATH
+
+try:
+    import wordfreq
+except ImportError:  # only needed to build the list
+    wordfreq = None
+
+# How many of wordfreq's most frequent English words to consider; far more
+# than any sensible --min-zipf keeps
+CANDIDATES = 300000
+
+HEADER = """\
+# Common English words, which fuzzy matching never corrects.
+# Every ASCII alphabetic word of three or more letters with a Zipf frequency
+# of at least {min_zipf} in wordfreq {version}, built by english_words.py.
+# Derived from wordfreq (https://github.com/rspeer/wordfreq), whose data is
+# licensed CC BY-SA 4.0 (https://creativecommons.org/licenses/by-sa/4.0/).
+"""
+
+
+def common_words(min_zipf=3.0):
+    """Return the sorted common English words from wordfreq."""
+    if wordfreq is None:
+        raise RuntimeError("building the word list requires wordfreq (pip install wordfreq)")
+    return sorted({
+        word for word in wordfreq.top_n_list('en', CANDIDATES)
+        if word.isascii() and word.isalpha() and len(word) >= 3
+        and wordfreq.zipf_frequency(word, 'en') >= min_zipf
+    })
+
+
+def write_word_list(words, path, min_zipf):
+    """Atomically replace the word list file."""
+    header = HEADER.format(min_zipf=min_zipf, version=importlib.metadata.version('wordfreq'))
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.english_words.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(header)
+            f.write('\n'.join(words) + '\n')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--min-zipf', type=float, default=3.0,
+                        help='least Zipf frequency kept (3.0 is about once per million words)')
+    parser.add_argument('--output', default=ENGLISH_WORDS_PATH)
+    args = parser.parse_args()
+
+    words = common_words(args.min_zipf)
+    write_word_list(words, args.output, args.min_zipf)
+    print(f"Wrote {len(words)} words to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
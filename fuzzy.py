@@ -0,0 +1,197 @@
+"""
+Spelling-tolerant term lookup for MediMate.
+Speech-to-text often produces near misses ("diabetis", "migrane", "asma").
+FuzzyIndex maps such tokens back to the vocabulary using a SymSpell-style
+deletion index built once at startup: every vocabulary word is stored under
+each string reachable by deleting up to max_distance characters, so a token
+is resolved with a handful of dict lookups instead of an edit-distance
+check against every word.
+"""
+import re
+import string
+
+_TOKEN_RE = re.compile(r'[^\W\d_]+')
+
+# Stripped from the ends of whitespace-separated query words
+_PUNCTUATION = string.punctuation + '\u2018\u2019\u201c\u201d'
+
+
+def _deletes(word, max_distance):
+    """Return word plus every string made by deleting up to max_distance characters."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a, b):
+    """Optimal string alignment distance: insertions, deletions, substitutions
+    and transpositions of adjacent characters each cost 1."""
+    if a == b:
+        return 0
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, previous2[j - 2] + 1)
+            current.append(cost)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """Corrects misspelled words in a query to the closest vocabulary word.
+
+    Only words of at least min_length characters are correction targets,
+    since short words sit one edit away from too much ordinary English
+    ("bone"/"done"). A target of fewer than eight letters allows one edit,
+    or up to max_distance if the token only drops letters from it, as
+    speech-to-text tends to ("asma"); a longer target allows one edit per
+    three letters, up to max_distance. The target must also share its first
+    and last letters with the token. That keeps most misspellings
+    ("diabetis", "migrane") while ruling out many real words
+    ("hear"/"heart", "never"/"fever") and two-edit guesses
+    ("career"/"cancer"). Vocabulary words,
+    words in exclude and their inflections are never corrected, and neither
+    are words in common_words, which are taken as written (a list of
+    ordinary English words already holds their inflected forms).
+
+    Tokens longer than the longest vocabulary word plus max_distance can
+    never match and are skipped without a lookup, and at most max_lookups
+    tokens are looked up per query, so the work per query stays bounded
+    however long the text is.
+    """
+
+    def __init__(self, terms, max_distance=2, min_length=5, exclude=(), suffixes=(), common_words=(),
+                 cache_size=8192, max_lookups=32):
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.max_lookups = max_lookups
+        self.cache_size = cache_size
+
+        # Single words, in the caller's order so ties go to the earlier word
+        words = dict.fromkeys(w for term in terms for w in _TOKEN_RE.findall(term.lower()))
+        self.words = tuple(words)
+        self._rank = {word: i for i, word in enumerate(self.words)}
+
+        # Tokens that are never corrected: vocabulary and excluded words and
+        # their inflections, and common words
+        known_words = self.words + tuple(w.lower() for w in exclude)
+        self.known = frozenset(w + suffix for w in known_words for suffix in ('',) + tuple(suffixes))
+        self.known |= frozenset(w.lower() for w in common_words)
+
+        self.index = {}
+        if max_distance > 0:
+            for word in self.words:
+                if len(word) >= min_length:
+                    for variant in _deletes(word, max_distance):
+                        self.index.setdefault(variant, []).append(word)
+
+        # Queries repeat the same few hundred words, so remember verdicts:
+        # words that need no correction, and token -> correction. Each starts
+        # over when it reaches cache_size entries.
+        self._clean = set()
+        self._corrections = {}
+        self._shortest_token = max(1, min_length - max_distance)
+        self._longest_token = max((len(w) for w in self.words if len(w) >= min_length), default=0) + max_distance
+
+    def _accepts(self, token, word, distance):
+        """Return True if token is close enough to the target word."""
+        if distance > self.max_distance:
+            return False
+        if len(word) >= 8:
+            return distance <= len(word) // 3
+        # When the distance is just the difference in length, every edit
+        # was a deletion: the token is the word with letters dropped
+        return distance <= 1 or distance == len(word) - len(token)
+
+    def lookup(self, token):
+        """Return the vocabulary word a lowercase token is a misspelling of, or None."""
+        if len(token) > self._longest_token:
+            return None
+        correction = self._corrections.get(token)
+        if correction is None:
+            correction = self._lookup(token)
+            if correction is not None:
+                self._remember(self._corrections, token, correction)
+        return correction
+
+    def _remember(self, cache, key, value=None):
+        if self.cache_size:
+            if len(cache) >= self.cache_size:
+                cache.clear()
+            if value is None:
+                cache.add(key)
+            else:
+                cache[key] = value
+
+    def _lookup(self, token):
+        best = None
+        for variant in _deletes(token, self.max_distance):
+            for word in self.index.get(variant, ()):
+                if word[0] != token[0] or word[-1] != token[-1]:
+                    continue
+                distance = edit_distance(token, word)
+                if not self._accepts(token, word, distance):
+                    continue
+                key = (distance, self._rank[word])
+                if best is None or key < best[0]:
+                    best = (key, word)
+        return best[1] if best else None
+
+    def _should_check(self, token):
+        return (self._shortest_token <= len(token) <= self._longest_token
+                and token not in self.known and token.isalpha())
+
+    def correct(self, text):
+        """Return text (lowercased) with misspelled words replaced.
+
+        Returns text itself, unchanged, when there is nothing to correct.
+        That is the common case, and once the words have been seen it costs
+        a split and two set differences.
+
+        Only the first max_lookups words that could be misspellings are
+        checked, in text order. Words whose verdict is cached count too, so
+        the result depends on the text alone, not on earlier queries.
+        """
+        if not self.index or not text:
+            return text
+        lowered = text.lower()
+        words = lowered.split()
+        unseen = set(words)
+        unseen -= self.known
+        unseen -= self._clean
+        if not unseen:
+            return text
+        corrections = {}
+        lookups = 0
+        for word in dict.fromkeys(words):
+            if word in self.known:
+                continue
+            if len(word) > 2 * self._longest_token:
+                # Far too long to be a misspelling, even wrapped in
+                # punctuation; not worth a cache slot either
+                continue
+            token = word.strip(_PUNCTUATION)
+            if not self._should_check(token):
+                self._remember(self._clean, word)
+                continue
+            if lookups >= self.max_lookups:
+                break
+            lookups += 1
+            if word in self._clean:
+                continue
+            correction = self.lookup(token)
+            if correction is None:
+                self._remember(self._clean, word)
+            else:
+                corrections[token] = correction
+        if not corrections:
+            return text
+        pattern = r'\b(?:' + '|'.join(re.escape(token) for token in corrections) + r')\b'
+        return re.sub(pattern, lambda m: corrections[m.group()], lowered)
@@ -0,0 +1,333 @@
+"""
+Shared HTTP client for the Heygen API.
+Every Heygen call in MediMate goes through HeygenClient so connections are
+reused and every call has timeouts, bounded retries and a circuit breaker.
+"""
+import asyncio
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+try:
+    import httpx
+except ImportError:  # only needed for the async (ASGI) serving mode
+    httpx = None
+
+# Upstream statuses worth retrying; anything else is returned to the caller
+RETRYABLE_STATUSES = frozenset([500, 502, 503, 504])
+
+# Methods safe to send twice. Other calls (POST streaming.create_token mints a
+# token and spends quota) are only retried if the first attempt never reached
+# Heygen: a failed or timed-out connect. A read timeout or 5xx may come after
+# Heygen already acted on the request.
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without calling Heygen while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    are rejected for reset_timeout seconds. A single trial call is then let
+    through; its outcome closes the circuit or opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may go upstream now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if self.clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+
+
+class RetryBudget:
+    """Caps retries to a fraction of overall traffic.
+
+    Each call deposits ratio into the budget and each retry withdraws one,
+    so a degraded upstream sees at most about (1 + ratio) times normal load.
+    """
+
+    def __init__(self, ratio=0.2, initial=3.0, max_balance=10.0):
+        self.ratio = ratio
+        self.max_balance = max_balance
+        self._balance = min(initial, max_balance)
+        self._lock = threading.Lock()
+
+    @property
+    def balance(self):
+        return self._balance
+
+    def deposit(self):
+        with self._lock:
+            self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def withdraw(self):
+        """Take one retry from the budget; return False if it is spent."""
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+def _connect_failed(error):
+    """Return True if a requests error means the request was never sent."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class _CallStats:
+    __slots__ = ('calls', 'errors', 'retries', 'total', 'max')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class _BaseHeygenClient:
+    """Configuration, retry policy and counters shared by both clients."""
+
+    def __init__(self, api_key, base_url='https://api.heygen.com', pool_size=10,
+                 connect_timeout=3.05, read_timeout=10.0, max_retries=2,
+                 backoff=0.2, max_backoff=2.0, retry_budget=None, breaker=None, on_call=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_budget = retry_budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker()
+        # Optional on_call(name, elapsed, error) hook, e.g. for metrics
+        self.on_call = on_call
+        self.headers = {
+            "Content-Type": "application/json",
+            "X-Api-Key": api_key or ''
+        }
+
+        self._stats = {}
+        self._rejected = 0
+        self._stats_lock = threading.Lock()
+
+    def stats(self):
+        """Return per-call latency counters and breaker state as a plain dict."""
+        with self._stats_lock:
+            calls = {
+                name: {
+                    'calls': s.calls,
+                    'errors': s.errors,
+                    'retries': s.retries,
+                    'latency_avg_ms': s.total / s.calls * 1000 if s.calls else 0.0,
+                    'latency_max_ms': s.max * 1000,
+                }
+                for name, s in self._stats.items()
+            }
+            rejected = self._rejected
+        return {
+            'calls': calls,
+            'circuit_state': self.breaker.state,
+            'circuit_rejected': rejected,
+            'retry_budget': self.retry_budget.balance,
+        }
+
+    def _admit(self, name):
+        """Check the breaker and fund the retry budget before a call."""
+        if not self.breaker.allow():
+            with self._stats_lock:
+                self._rejected += 1
+            raise CircuitOpenError(f"Heygen circuit breaker is open; not calling {name}")
+        self.retry_budget.deposit()
+
+    def _should_retry(self, name, status, attempt, safe_to_resend=True):
+        """Record a failed attempt and decide whether to try again.
+
+        status is the HTTP status if Heygen answered, or None for connection
+        errors and timeouts. safe_to_resend is False when a retry could make
+        Heygen act on the request twice.
+        """
+        if status is not None and status not in RETRYABLE_STATUSES:
+            # Heygen answered; the request itself was rejected
+            self.breaker.record_success()
+            return False
+        self.breaker.record_failure()
+        if not safe_to_resend or attempt >= self.max_retries:
+            return False
+        if not self.breaker.allow() or not self.retry_budget.withdraw():
+            return False
+        self._record_retry(name)
+        return True
+
+    def _backoff_delay(self, attempt):
+        """Full-jitter exponential backoff before retry number attempt."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+    def _record(self, name, elapsed, error=False):
+        with self._stats_lock:
+            stats = self._stats.setdefault(name, _CallStats())
+            stats.calls += 1
+            stats.errors += error
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+        if self.on_call is not None:
+            self.on_call(name, elapsed, error)
+
+    def _record_retry(self, name):
+        with self._stats_lock:
+            self._stats.setdefault(name, _CallStats()).retries += 1
+
+
+class HeygenClient(_BaseHeygenClient):
+    """Keep-alive Heygen API client with timeouts, retries and a circuit breaker."""
+
+    def __init__(self, api_key, base_url='https://api.heygen.com', **options):
+        super().__init__(api_key, base_url, **options)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(self.headers)
+
+    def create_streaming_token(self):
+        """Create a session token for the Heygen Streaming API."""
+        return self.request('POST', '/v1/streaming.create_token', name='streaming.create_token')
+
+    def list_avatars(self):
+        """Fetch the avatars available to this account."""
+        return self.request('GET', '/v2/avatars', name='avatars')
+
+    def request(self, method, path, name=None, **kwargs):
+        """Call Heygen and return the decoded JSON body.
+
+        Connection errors, timeouts and 5xx responses are retried with
+        jittered exponential backoff while the retry budget allows; for
+        methods outside IDEMPOTENT_METHODS only failed connects are. Raises a
+        requests.exceptions.RequestException subclass on failure.
+        """
+        name = name or path
+        self._admit(name)
+        url = f"{self.base_url}{path}"
+        timeout = (self.connect_timeout, self.read_timeout)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                self._record(name, time.perf_counter() - started, error=True)
+                status = e.response.status_code if e.response is not None else None
+                safe = method.upper() in IDEMPOTENT_METHODS or _connect_failed(e)
+                if not self._should_retry(name, status, attempt, safe):
+                    raise
+                attempt += 1
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            self._record(name, time.perf_counter() - started)
+            self.breaker.record_success()
+            return response.json()
+
+
+class AsyncHeygenClient(_BaseHeygenClient):
+    """asyncio counterpart of HeygenClient, built on httpx.
+
+    Raises httpx.HTTPError subclasses (or CircuitOpenError) on failure.
+    Call aclose() when the event loop shuts down.
+    """
+
+    def __init__(self, api_key, base_url='https://api.heygen.com', **options):
+        if httpx is None:
+            raise RuntimeError("AsyncHeygenClient requires httpx (pip install httpx)")
+        super().__init__(api_key, base_url, **options)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+        )
+
+    async def create_streaming_token(self):
+        """Create a session token for the Heygen Streaming API."""
+        return await self.request('POST', '/v1/streaming.create_token', name='streaming.create_token')
+
+    async def list_avatars(self):
+        """Fetch the avatars available to this account."""
+        return await self.request('GET', '/v2/avatars', name='avatars')
+
+    async def request(self, method, path, name=None, **kwargs):
+        """Call Heygen and return the decoded JSON body (see HeygenClient.request)."""
+        name = name or path
+        self._admit(name)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, path, **kwargs)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                self._record(name, time.perf_counter() - started, error=True)
+                status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                safe = method.upper() in IDEMPOTENT_METHODS or isinstance(
+                    e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                if not self._should_retry(name, status, attempt, safe):
+                    raise
+                attempt += 1
+                await asyncio.sleep(self._backoff_delay(attempt))
+                continue
+
+            self._record(name, time.perf_counter() - started)
+            self.breaker.record_success()
+            return response.json()
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -0,0 +1,249 @@
+"""
+MediMate medical knowledge.
+The keywords, response topics and fallback reply live in knowledge.json, not
+in code. KnowledgeBase compiles them into an immutable Knowledge snapshot
+(keyword matcher, topic index and fuzzy index) and swaps in a new one when
+the file changes, so content edits need no redeploy or restart.
+
+Run as a script to check a knowledge file before shipping it:
+
+    python knowledge.py [path]
+"""
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from fuzzy import FuzzyIndex
+from matcher import KEYWORD_SUFFIXES, KeywordMatcher, TopicIndex
+
+logger = logging.getLogger(__name__)
+
+# Default knowledge file, next to the app
+KNOWLEDGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'knowledge.json')
+
+# Common English words, which fuzzy matching leaves alone however close they
+# are to a medical term ("career"/"cancer", "sheep"/"sleep"). Built at install
+# time by english_words.py.
+ENGLISH_WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'english_words.txt')
+
+# One compiled version of the knowledge file. Never modified once built;
+# version is a hash of the file's content.
+Knowledge = namedtuple('Knowledge', [
+    'version', 'keywords', 'topics', 'non_medical_response', 'fuzzy_excluded_words',
+    'matcher', 'topic_index', 'fuzzy_index',
+])
+
+
+def read_knowledge(path=KNOWLEDGE_PATH):
+    """Load and validate a knowledge file; return its content as a dict.
+
+    "keywords" is either a list or an object of named keyword groups.
+    The optional "forms" object lists other spellings of a keyword or topic
+    term, {"cough": ["coughed", "coughing"]}; plurals need no listing.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError(f"malformed knowledge file: {path}")
+
+    keywords = data.get('keywords')
+    if isinstance(keywords, dict):
+        keywords = [keyword for group in keywords.values() for keyword in group]
+    if not isinstance(keywords, list) or not keywords or not all(_is_word(k) for k in keywords):
+        raise ValueError(f"knowledge file has no keyword list: {path}")
+
+    topics = data.get('topics')
+    if not isinstance(topics, list):
+        raise ValueError(f"knowledge file has no topic list: {path}")
+    for topic in topics:
+        _check_topic(topic, path)
+        subtopics = topic.get('subtopics', [])
+        if not isinstance(subtopics, list):
+            raise ValueError(f"subtopics of topic {topic['name']!r} are not a list in {path}")
+        for subtopic in subtopics:
+            _check_topic(subtopic, path)
+
+    forms = data.get('forms', {})
+    if not (isinstance(forms, dict) and all(isinstance(v, list) and all(_is_word(f) for f in v)
+                                            for v in forms.values())):
+        raise ValueError(f"knowledge file has malformed forms: {path}")
+
+    response = data.get('non_medical_response')
+    if not isinstance(response, str) or not response:
+        raise ValueError(f"knowledge file has no non_medical_response: {path}")
+
+    excluded = data.get('fuzzy_excluded_words', [])
+    if not isinstance(excluded, list) or not all(_is_word(w) for w in excluded):
+        raise ValueError(f"knowledge file has malformed fuzzy_excluded_words: {path}")
+
+    return {
+        'version': hashlib.sha256(raw).hexdigest()[:16],
+        'keywords': keywords,
+        'forms': forms,
+        'topics': topics,
+        'non_medical_response': response,
+        'fuzzy_excluded_words': excluded,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def read_word_list(path=ENGLISH_WORDS_PATH):
+    """Return the words in a word list file (one per line, # starts a comment).
+
+    A missing file gives an empty list, with a warning: the app still works,
+    but fuzzy matching may then correct ordinary words.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            return frozenset(line.strip().lower() for line in f if line.strip() and not line.startswith('#'))
+    except FileNotFoundError:
+        logger.warning("No word list at %s; run python english_words.py to build it", path)
+        return frozenset()
+
+
+def _is_word(value):
+    return isinstance(value, str) and bool(value.strip())
+
+
+def _check_topic(topic, path):
+    if not (isinstance(topic, dict) and isinstance(topic.get('name'), str)
+            and isinstance(topic.get('terms'), list) and all(_is_word(term) for term in topic['terms'])
+            and isinstance(topic.get('response'), str)):
+        raise ValueError(f"malformed topic {topic.get('name') if isinstance(topic, dict) else topic!r} in {path}")
+
+
+def _freeze_topic(topic):
+    frozen = dict(topic, terms=tuple(topic['terms']))
+    if 'subtopics' in topic:
+        frozen['subtopics'] = tuple(_freeze_topic(subtopic) for subtopic in topic['subtopics'])
+    return MappingProxyType(frozen)
+
+
+def compile_knowledge(data, fuzzy_max_distance=2, fuzzy_min_length=5):
+    """Build a Knowledge snapshot from read_knowledge() output."""
+    topics = tuple(_freeze_topic(topic) for topic in data['topics'])
+    keywords = tuple(data['keywords'])
+    excluded = tuple(data['fuzzy_excluded_words'])
+    forms = {word: tuple(spellings) for word, spellings in data['forms'].items()}
+    spellings = tuple(form for word_forms in forms.values() for form in word_forms)
+    # Only keywords make a query medical; topic terms such as "hot" or
+    # "period" pick the answer but are ordinary words on their own
+    topic_index = TopicIndex(topics, vocabulary=keywords, forms=forms)
+    return Knowledge(
+        version=data['version'],
+        keywords=keywords,
+        topics=topics,
+        non_medical_response=data['non_medical_response'],
+        fuzzy_excluded_words=excluded,
+        matcher=KeywordMatcher(keywords, forms=forms),
+        topic_index=topic_index,
+        fuzzy_index=FuzzyIndex(
+            keywords + tuple(topic_index.index) + spellings,
+            max_distance=fuzzy_max_distance,
+            min_length=fuzzy_min_length,
+            exclude=excluded,
+            suffixes=KEYWORD_SUFFIXES,
+            common_words=read_word_list()
+        ),
+    )
+
+
+class KnowledgeBase:
+    """The current Knowledge snapshot, reloaded when the file changes.
+
+    current() is a plain attribute read, so requests never wait on a lock.
+    A reload compiles the new snapshot aside and then swaps it in whole, so
+    requests in flight finish on the snapshot they started with. Only one
+    caller reloads at a time; the others keep serving the old snapshot. A
+    file that fails to load is logged and the old snapshot stays in use.
+    """
+
+    def __init__(self, path=KNOWLEDGE_PATH, reload_interval=5.0, fuzzy_max_distance=2,
+                 fuzzy_min_length=5, clock=time.monotonic):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.fuzzy_max_distance = fuzzy_max_distance
+        self.fuzzy_min_length = fuzzy_min_length
+        self.clock = clock
+        self.reloads = 0
+        self.reload_errors = 0
+        self._reload_lock = threading.Lock()
+        self._failed_mtime = None
+        self._next_check = clock() + reload_interval
+        # There is no built-in fallback, so a missing or broken file fails startup
+        self._mtime = os.stat(path).st_mtime_ns
+        self._knowledge = self._compile(read_knowledge(path))
+
+    def current(self):
+        """Return the current snapshot, first reloading it if the file changed."""
+        if self.clock() >= self._next_check:
+            self.maybe_reload()
+        return self._knowledge
+
+    def maybe_reload(self, force=False):
+        """Reload the file if it changed, checking at most every reload_interval seconds."""
+        now = self.clock()
+        if not force and now < self._next_check:
+            return False
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_check = now + self.reload_interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return False
+            if mtime == self._mtime:
+                return False
+            try:
+                data = read_knowledge(self.path)
+                knowledge = self._knowledge if data['version'] == self._knowledge.version else self._compile(data)
+            except Exception as e:
+                # Validation cannot foresee every way compiling can fail, and a
+                # bad file must never fail the requests that trigger a reload.
+                # Try again next interval, in case the file was caught mid-write,
+                # but only report each broken version of the file once
+                if mtime != self._failed_mtime:
+                    self._failed_mtime = mtime
+                    self.reload_errors += 1
+                    logger.warning("Keeping knowledge %s; could not load %s: %s", self._knowledge.version, self.path, e)
+                return False
+            self._mtime = mtime
+            if knowledge is self._knowledge:
+                return False
+            self._knowledge = knowledge
+            self.reloads += 1
+            logger.info("Loaded knowledge %s from %s", data['version'], self.path)
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def _compile(self, data):
+        return compile_knowledge(data, self.fuzzy_max_distance, self.fuzzy_min_length)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', default=KNOWLEDGE_PATH)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    knowledge = compile_knowledge(read_knowledge(args.path))
+    elapsed = time.perf_counter() - started
+    subtopics = sum(len(topic.get('subtopics', ())) for topic in knowledge.topics)
+    print(f"{args.path}: version {knowledge.version}")
+    print(f"{len(knowledge.matcher.keywords)} keywords, {len(knowledge.topics)} topics "
+          f"({subtopics} subtopics), {len(knowledge.topic_index.index)} topic terms")
+    print(f"compiled in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Keyword matching for MediMate.
+Compiles a keyword list once into a single trie-shaped regular expression so a
+query can be scanned in one pass instead of one substring search per keyword.
+"""
+import re
+from collections import namedtuple
+
+# A single keyword hit: the canonical keyword, its span in the original text,
+# and the compound word it was the first half of, if any ("ache" in "toothache")
+KeywordMatch = namedtuple('KeywordMatch', ['keyword', 'start', 'end', 'compound'], defaults=(None,))
+
+# Plural endings tolerated after any keyword ("headaches", "rashes"). A keyword
+# must start on a word boundary and anything after it other than these must
+# end the word, so "ear" no longer matches "year". Other inflections are given
+# per keyword as forms ("coughing", "painful"), since a suffix that inflects
+# one keyword makes another word of the next ("arm"/"army", "head"/"header").
+KEYWORD_SUFFIXES = ('s', 'es')
+
+# Words that make a compound with the keyword before them: "toothache",
+# "backache", "heartburn", "painkillers". Compounds whose first half is no
+# keyword ("sunburn", "nosebleed") are listed as forms instead.
+KEYWORD_COMPOUNDS = ('ache', 'burn', 'killer')
+
+# Adjectives derived from a keyword by replacing its ending: "diabetes" ->
+# "diabetic", "asthma" -> "asthmatic", "allergy" -> "allergic". The first
+# matching ending applies.
+KEYWORD_DERIVATIONS = (
+    ('itis', 'itic'),
+    ('sy', 'tic'),
+    ('ia', 'ic'),
+    ('es', 'ic'),
+    ('y', 'ic'),
+    ('a', 'atic'),
+)
+
+
+def derived_forms(keyword, derivations=KEYWORD_DERIVATIONS):
+    """Return the adjective forms of a single-word keyword (none for short words)."""
+    if len(keyword) < 5 or not keyword.isalpha():
+        return ()
+    for ending, replacement in derivations:
+        if keyword.endswith(ending):
+            return (keyword[:-len(ending)] + replacement,)
+    return ()
+
+
+def _trie_pattern(words):
+    """Build a regex alternation shaped like a prefix trie of the given words.
+
+    Sharing prefixes means the regex engine only follows the branch for the
+    next character instead of trying every keyword at every position.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        terminal = '' in node
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        pattern = '(?:' + '|'.join(branches) + ')'
+        # Branches are greedy, so the longest keyword is preferred
+        return pattern + '?' if terminal else pattern
+
+    return build(trie)
+
+
+def _alternation(words):
+    return '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+class KeywordMatcher:
+    """Matches whole keywords in text with a single precompiled regex.
+
+    Besides plurals, a keyword also matches in the forms listed for it
+    (forms maps a keyword to other spellings of it, {"cough": ["coughing"]}),
+    as the first half of a compound ("tooth" in "toothache") and in its
+    derived adjective form ("diabetic" for "diabetes").
+    """
+
+    def __init__(self, keywords, suffixes=KEYWORD_SUFFIXES, compounds=KEYWORD_COMPOUNDS,
+                 derivations=KEYWORD_DERIVATIONS, forms=None):
+        # Deduplicate while keeping the caller's order
+        self.keywords = tuple(dict.fromkeys(k.lower() for k in keywords if k))
+        # Every spelling the pattern looks for -> the keyword it stands for
+        self.forms = {keyword: keyword for keyword in self.keywords}
+        for keyword, spellings in (forms or {}).items():
+            keyword = keyword.lower()
+            if keyword in self.forms:
+                for form in spellings:
+                    self.forms.setdefault(form.lower(), keyword)
+        for keyword in self.keywords:
+            for form in derived_forms(keyword, derivations):
+                self.forms.setdefault(form, keyword)
+        source = (r'\b(?P<keyword>' + _trie_pattern(self.forms) + r')'
+                  r'(?P<compound>' + _alternation(compounds) + r')?'
+                  r'(?:' + _alternation(suffixes) + r')?\b')
+        # Scanning lowercased text is much faster than re.IGNORECASE; the
+        # case-insensitive pattern is only needed when lower() changes length
+        # and the spans would no longer line up with the original text.
+        self.pattern = re.compile(source) if self.keywords else None
+        self._pattern_ignorecase = re.compile(source, re.IGNORECASE) if self.keywords else None
+
+    def _scan(self, text):
+        """Return (pattern, subject) to run so spans refer to the original text."""
+        text_lower = text.lower()
+        if len(text_lower) == len(text):
+            return self.pattern, text_lower
+        return self._pattern_ignorecase, text
+
+    def search(self, text):
+        """Return the first KeywordMatch in text, or None."""
+        if self.pattern is None or not text:
+            return None
+        pattern, subject = self._scan(text)
+        match = pattern.search(subject)
+        if match is None:
+            return None
+        return self._match(match)
+
+    def find_all(self, text):
+        """Return every non-overlapping KeywordMatch in text, left to right."""
+        if self.pattern is None or not text:
+            return []
+        pattern, subject = self._scan(text)
+        return [self._match(m) for m in pattern.finditer(subject)]
+
+    def _match(self, match):
+        compound = match.group('compound')
+        return KeywordMatch(self.forms[match.group('keyword').lower()], match.start(), match.end(),
+                            compound.lower() if compound else None)
+
+    def matches(self, text):
+        """Return True if any keyword occurs in text."""
+        return self.search(text) is not None
+
+
+class TopicIndex:
+    """Resolves a query to the highest-priority response topic in one scan.
+
+    Topics are dicts with 'name', 'terms' and 'response', listed in priority
+    order. A topic may carry 'subtopics' in the same shape; when the topic
+    wins, its first matching subtopic answers instead.
+
+    Words in vocabulary are matched too, without answering anything on their
+    own, so that their compounds still count: "toothache" reaches the pain
+    topic through "ache" although "tooth" is no topic term. forms are
+    passed on to the matcher.
+    """
+
+    def __init__(self, topics, vocabulary=(), suffixes=KEYWORD_SUFFIXES, forms=None):
+        self.topics = tuple(topics)
+
+        # term -> {(topic position, subtopic position or None)}
+        owners = {}
+        for i, topic in enumerate(self.topics):
+            for term in topic['terms']:
+                owners.setdefault(term.lower(), set()).add((i, None))
+            for j, subtopic in enumerate(topic.get('subtopics', ())):
+                for term in subtopic['terms']:
+                    owners.setdefault(term.lower(), set()).add((i, j))
+
+        # The matcher prefers the longest term, so "heart attack" hides the
+        # "heart" inside it and the vocabulary word "panic attack" hides the
+        # topic term "panic". Credit each word with every term it contains.
+        vocabulary = [word.lower() for word in vocabulary if word]
+        self.index = {}
+        for term in dict.fromkeys(list(owners) + vocabulary):
+            hits = set(owners.get(term, ()))
+            for other, other_hits in owners.items():
+                if other != term and other in term and KeywordMatcher([other], suffixes).matches(term):
+                    hits |= other_hits
+            if hits:
+                self.index[term] = frozenset(hits)
+
+        self.matcher = KeywordMatcher(list(owners) + vocabulary, suffixes, forms=forms)
+
+    def lookup(self, text):
+        """Return the winning topic (or subtopic) dict for text, or None."""
+        hits = set()
+        for match in self.matcher.find_all(text):
+            hits |= self.index.get(match.keyword, frozenset())
+            if match.compound:
+                hits |= self.index.get(match.compound, frozenset())
+        topic_hits = [i for i, j in hits if j is None]
+        if not topic_hits:
+            return None
+        winner = min(topic_hits)
+        topic = self.topics[winner]
+        subtopic_hits = [j for i, j in hits if i == winner and j is not None]
+        if subtopic_hits:
+            return topic['subtopics'][min(subtopic_hits)]
+        return topic
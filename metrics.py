@@ -0,0 +1,154 @@
+"""
+Lightweight metrics for MediMate.
+Counters and histograms cheap enough to leave on in production, rendered in
+the Prometheus text exposition format for the /metrics endpoint.
+
+Metrics are per process; with several workers, scrape each one or aggregate
+in Prometheus.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Request/operation latency buckets in seconds, from 100us to 10s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels."""
+
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            yield f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}'
+
+
+class Histogram:
+    """Observations counted into fixed buckets, optionally split by labels."""
+
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labelvalues -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labelvalues):
+        """Observe how long the with-block takes."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def count(self, *labelvalues):
+        series = self._series.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def render(self):
+        with self._lock:
+            snapshot = sorted((labels, list(series)) for labels, series in self._series.items())
+        bounds = self.buckets + (float('inf'),)
+        for labelvalues, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{_format_value(float(bound))}"')
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f'{self.name}_sum{labels} {_format_value(series[-1])}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Registry:
+    """A set of metrics plus collectors that report gauges at scrape time."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """Register collect() -> iterable of (name, help, labels dict, value) gauges."""
+        self._collectors.append(collect)
+        return collect
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.render())
+
+        gauges = {}
+        for collect in self._collectors:
+            for name, help, labels, value in collect():
+                gauges.setdefault(name, (help, []))[1].append((labels, value))
+        for name, (help, samples) in gauges.items():
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} gauge')
+            for labels, value in samples:
+                names = tuple(labels)
+                lines.append(f'{name}{_format_labels(names, [labels[n] for n in names])} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,85 @@
+"""
+Opt-in sampling profiler for single requests.
+Samples one thread's Python stack at a fixed interval and reports the
+result as collapsed stacks, the input format of flamegraph.pl/speedscope.
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Samples the stack of the thread that called start() until stop()."""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.samples = Counter()
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._sampler = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and return the collapsed stacks as text."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        return self.collapsed()
+
+    def collapsed(self):
+        """One 'outer;...;inner count' line per distinct stack, busiest first."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename}:{frame.f_lineno})')
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+
+def profile_requested(header, token):
+    """Return True if an X-Profile header value carries the profiling token.
+
+    An empty token turns profiling off.
+    """
+    return bool(token) and header is not None and hmac.compare_digest(header.encode(), token.encode())
+
+
+def profile_filename(directory, route):
+    """Build a unique, filesystem-safe path for one request profile."""
+    slug = ''.join(c if c.isalnum() else '_' for c in route).strip('_') or 'root'
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns() % 10**9:09d}-{slug}.folded"
+    return os.path.join(directory, name)
+
+
+def save_profile(directory, route, stacks, max_files=100):
+    """Write one request's collapsed stacks and return the file name.
+
+    Only the newest max_files profiles are kept in directory.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = profile_filename(directory, route)
+    with open(path, 'w') as f:
+        f.write(stacks)
+    # Names start with a timestamp, so they sort oldest first
+    profiles = sorted(name for name in os.listdir(directory) if name.endswith('.folded'))
+    for name in profiles[:max(0, len(profiles) - max_files)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass  # removed by a concurrent request
+    return os.path.basename(path)
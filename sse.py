@@ -0,0 +1,36 @@
+"""
+Server-Sent Events for streamed check_query answers.
+Answers are split into sentences so the avatar can start speaking the first
+one while the rest are still on the way.
+"""
+import json
+import re
+from functools import lru_cache
+
+# A sentence ends at . ! or ? followed by whitespace and a capital, digit or quote
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+(?=["\'(A-Z0-9])')
+
+
+@lru_cache(maxsize=256)
+def split_sentences(text):
+    """Split text into a tuple of sentences, keeping their punctuation."""
+    if not text:
+        return ()
+    return tuple(s for s in _SENTENCE_END_RE.split(text.strip()) if s)
+
+
+def format_event(event, data):
+    """Encode one SSE event with a JSON data field."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def answer_events(payload):
+    """Yield a check_query payload as SSE events.
+
+    One "chunk" event per sentence of the response ({"index", "text"}), then a
+    "done" event carrying the full payload plus the number of chunks sent.
+    """
+    chunks = split_sentences(payload['response'])
+    for index, text in enumerate(chunks):
+        yield format_event('chunk', {'index': index, 'text': text})
+    yield format_event('done', dict(payload, chunks=len(chunks)))
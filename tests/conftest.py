@@ -0,0 +1,25 @@
+"""
+Shared setup for the MediMate tests.
+The app modules live at the repository root; run the tests from there with:
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+# Settings for importing app.py: never call the real Heygen API, mint tokens
+# only on demand, and leave admission control to the tests that exercise it
+for name, value in {
+    'HEYGEN_API_BASE_URL': 'http://127.0.0.1:9',
+    'HEYGEN_API_KEY': 'test',
+    'TOKEN_POOL_SIZE': '0',
+    'CHECK_QUERY_CACHE_SIZE': '0',
+    'CREATE_TOKEN_RATE': '0',
+    'CHECK_QUERY_RATE': '0',
+    'UPSTREAM_CONCURRENCY': '0',
+}.items():
+    os.environ[name] = value
@@ -0,0 +1,161 @@
+"""Tests for admission control: rate limits, the upstream queue and 429s."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+import app
+from admission import AdmissionRejected, AsyncConcurrencyLimiter, ConcurrencyLimiter, RateLimiter
+from heygen_stub import HeygenStub
+from token_pool import TokenPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_allows_a_burst_then_the_rate():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+    for _ in range(3):
+        limiter.acquire('a')
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire('a')
+    assert rejected.value.reason == 'rate_limited'
+    assert rejected.value.retry_after == pytest.approx(0.5)
+    limiter.acquire('b')  # other clients have their own bucket
+    clock.now = 0.5
+    limiter.acquire('a')
+    assert limiter.stats()['admitted'] == 5
+    assert limiter.stats()['rate_limited'] == 1
+
+
+def test_rate_limiter_forgets_the_least_recent_clients():
+    limiter = RateLimiter(rate=1, burst=1, max_clients=2, clock=FakeClock())
+    for client in ('a', 'b', 'c'):
+        limiter.acquire(client)
+    assert limiter.stats()['clients'] == 2
+    limiter.acquire('a')  # evicted, so it starts over with a full bucket
+
+
+def test_rate_of_zero_admits_everything():
+    limiter = RateLimiter(rate=0, burst=1)
+    for _ in range(10):
+        limiter.acquire('a')
+
+
+def test_concurrency_limiter_queue_full_and_timeout():
+    limiter = ConcurrencyLimiter(1, queue_size=1, queue_timeout=0.1)
+    limiter.acquire()
+    reasons = []
+
+    def wait_for_a_slot():
+        try:
+            limiter.acquire()
+        except AdmissionRejected as e:
+            reasons.append(e.reason)
+
+    waiter = threading.Thread(target=wait_for_a_slot)
+    waiter.start()
+    time.sleep(0.02)
+    wait_for_a_slot()
+    waiter.join()
+    assert reasons == ['queue_full', 'queue_timeout']
+    stats = limiter.stats()
+    assert (stats['in_flight'], stats['waiting'], stats['queued']) == (1, 0, 1)
+    assert (stats['shed_queue_full'], stats['shed_queue_timeout']) == (1, 1)
+
+
+def test_concurrency_limiter_hands_a_released_slot_to_the_queue():
+    limiter = ConcurrencyLimiter(1, queue_size=1, queue_timeout=5)
+    limiter.acquire()
+    waiter = threading.Thread(target=limiter.acquire)
+    waiter.start()
+    time.sleep(0.02)
+    limiter.release()
+    waiter.join()
+    assert limiter.stats()['admitted'] == 2
+
+
+def test_async_concurrency_limiter():
+    async def scenario():
+        limiter = AsyncConcurrencyLimiter(1, queue_size=1, queue_timeout=0.1)
+        await limiter.acquire()
+        # A cancelled waiter leaves the queue
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        with pytest.raises(AdmissionRejected, match='busy'):
+            await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        await limiter.release()
+        await waiter
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats['in_flight'], stats['waiting'], stats['shed_queue_timeout']) == (1, 0, 1)
+
+
+def test_pool_hits_skip_admission():
+    def refuse():
+        raise AssertionError("admit entered on a pool hit")
+
+    pool = TokenPool(lambda: {'token': 'x'}, size=1)
+    pool.start()
+    deadline = time.time() + 5
+    while pool.stats()['available'] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    try:
+        assert pool.acquire(admit=refuse) == {'token': 'x'}
+    finally:
+        pool.stop()
+
+
+def test_rate_limited_requests_get_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(app, 'CHECK_QUERY_LIMITER', RateLimiter(rate=0.1, burst=2))
+    client = app.app.test_client()
+    statuses = [client.post('/api/check_query', json={'text': 'headache'}).status_code for _ in range(2)]
+    response = client.post('/api/check_query', json={'text': 'headache'})
+    assert statuses == [200, 200]
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '10'
+    assert response.get_json()['reason'] == 'rate_limited'
+
+
+def test_create_token_sheds_past_the_queue_against_a_slow_stub(monkeypatch):
+    stub = HeygenStub(('127.0.0.1', 0), latency=0.3).start()
+    try:
+        monkeypatch.setattr(app.HEYGEN_CLIENT, 'base_url', stub.base_url)
+        monkeypatch.setattr(app, 'UPSTREAM_LIMITER', ConcurrencyLimiter(1, queue_size=1, queue_timeout=5))
+        results = []
+
+        def create_token():
+            started = time.perf_counter()
+            response = app.app.test_client().post('/api/create_token')
+            results.append((response.status_code, response.headers.get('Retry-After'),
+                            time.perf_counter() - started))
+
+        threads = [threading.Thread(target=create_token) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+    served = [r for r in results if r[0] == 200]
+    shed = [r for r in results if r[0] == 429]
+    assert len(served) == 2 and len(shed) == 4
+    # Shed at once, without waiting on Heygen
+    assert all(retry_after == '1' and seconds < 0.3 for _, retry_after, seconds in shed)
+    stats = app.UPSTREAM_LIMITER.stats()
+    assert (stats['queued'], stats['shed_queue_full'], stats['in_flight']) == (1, 4, 0)
@@ -0,0 +1,112 @@
+"""Tests for building the avatar list from Heygen's catalog, and serving it."""
+import os
+
+import pytest
+
+import app
+from avatars import DEFAULT_AVATAR_ICON, AvatarCatalog, merge_avatars, write_snapshot
+
+KNOWN = [
+    {'id': 'doctor', 'name': 'Doctor', 'icon': 'fas fa-user-md'},
+    {'id': 'nurse', 'name': 'Nurse', 'icon': 'fas fa-user-nurse'},
+]
+
+OFFERED = [
+    {'avatar_id': 'stock_1', 'avatar_name': 'Stock One'},
+    {'avatar_id': 'nurse', 'avatar_name': 'Anna'},
+    {'avatar_id': 'stock_2', 'avatar_name': 'Stock Two'},
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def write(path, avatars, mtime):
+    write_snapshot(avatars, path)
+    # Set the mtime explicitly: writes within one clock tick can share it
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_only_curated_avatars_by_default():
+    assert merge_avatars(OFFERED, KNOWN) == [KNOWN[1]]
+
+
+def test_included_avatars_are_appended():
+    assert merge_avatars(OFFERED, KNOWN, include=['stock_2', 'missing']) == [
+        KNOWN[1], {'id': 'stock_2', 'name': 'Stock Two', 'icon': DEFAULT_AVATAR_ICON}]
+
+
+def test_include_all():
+    ids = [avatar['id'] for avatar in merge_avatars(OFFERED, KNOWN, include_all=True)]
+    assert ids == ['nurse', 'stock_1', 'stock_2']
+
+
+def test_catalog_picks_up_a_new_snapshot(tmp_path):
+    path = tmp_path / 'avatar_catalog.json'
+    clock = FakeClock()
+    catalog = AvatarCatalog(path, fallback=KNOWN, reload_interval=30, clock=clock)
+    assert catalog.avatars == tuple(KNOWN)  # no snapshot yet
+    fallback_version = catalog.version
+
+    write(path, KNOWN[:1], 1)
+    clock.now = 30
+    catalog.maybe_reload()
+    assert catalog.avatars == tuple(KNOWN[:1])
+    assert catalog.version != fallback_version
+
+    write(path, KNOWN[1:], 2)
+    clock.now = 45
+    catalog.maybe_reload()
+    assert catalog.avatars == tuple(KNOWN[:1])  # not checked again until the interval is up
+    clock.now = 60
+    catalog.maybe_reload()
+    assert catalog.avatars == tuple(KNOWN[1:])
+
+    version = catalog.version
+    path.write_text('{"avatars": [{"name": "no id"}]}')
+    os.utime(path, ns=(3, 3))
+    clock.now = 90
+    catalog.maybe_reload()
+    assert (catalog.avatars, catalog.version) == (tuple(KNOWN[1:]), version)  # broken snapshot ignored
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    path = tmp_path / 'avatar_catalog.json'
+    write(path, KNOWN, 1)
+    catalog = AvatarCatalog(path, reload_interval=0)
+    monkeypatch.setattr(app, 'AVATAR_CATALOG', catalog)
+    monkeypatch.setattr(app, '_catalog_documents', {})
+    return path
+
+
+def test_config_etag_and_not_modified(catalog):
+    client = app.app.test_client()
+    response = client.get('/api/config')
+    assert response.status_code == 200
+    assert response.get_json()['avatars'] == KNOWN
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == f'public, max-age={app.CONFIG_MAX_AGE}'
+
+    cached = client.get('/api/config', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == etag
+
+    assert client.get('/api/config', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_config_etag_changes_with_the_snapshot(catalog):
+    client = app.app.test_client()
+    etag = client.get('/api/config').headers['ETag']
+
+    write(catalog, KNOWN[:1], 2)
+    response = client.get('/api/config', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['avatars'] == KNOWN[:1]
+    assert response.headers['ETag'] != etag
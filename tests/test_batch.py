@@ -0,0 +1,119 @@
+"""Tests for batch check_query: NDJSON parsing, ordering and the endpoint."""
+import asyncio
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+import app
+import asgi_app
+from batch import item_text, ordered_map, parse_ndjson
+
+QUERIES = ['I have a headache', {'text': 'my knee hurts'}, 'what is the capital of France', 42]
+
+
+def test_parse_ndjson():
+    lines = [b'"I have a headache"\n', '\n', '{"text": "my knee hurts"}', '  ', 'not json', b'[1, 2]']
+    items = list(parse_ndjson(lines))
+    assert items[:2] == ['I have a headache', {'text': 'my knee hurts'}]
+    assert isinstance(items[2], ValueError) and str(items[2]).startswith('invalid JSON')
+    assert items[3] == [1, 2]
+
+
+def test_item_text():
+    assert item_text('I have a headache') == 'I have a headache'
+    assert item_text({'text': 'my knee hurts', 'id': 7}) == 'my knee hurts'
+    assert item_text({}) == ''
+    for item in (42, None, ['a'], {'text': 3}):
+        with pytest.raises(ValueError):
+            item_text(item)
+
+
+def slow_for_small(n):
+    # Later items finish first, so only ordered_map keeps them in order
+    time.sleep((20 - n) / 2000)
+    return n * n
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64])
+def test_ordered_map_keeps_input_order(chunk_size):
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = ordered_map(slow_for_small, range(20), executor, chunk_size=chunk_size, max_pending=4)
+        assert list(results) == [n * n for n in range(20)]
+    assert list(ordered_map(slow_for_small, range(5))) == [0, 1, 4, 9, 16]
+
+
+def test_ordered_map_bounds_the_work_in_flight():
+    consumed = []
+    lock = threading.Lock()
+
+    def items():
+        for n in range(1000):
+            with lock:
+                consumed.append(n)
+            yield n
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = ordered_map(abs, items(), executor, chunk_size=10, max_pending=3)
+        assert next(results) == 0
+        assert len(consumed) <= 10 * 3 + 1
+        assert list(results) == list(range(1, 1000))
+
+
+def expected_lines():
+    lines = [app.check_query_payload(item_text(q)) for q in QUERIES[:3]]
+    return lines + [{'error': "each item must be a string or an object with a 'text' string"}]
+
+
+def test_batch_endpoint_json_array():
+    response = app.app.test_client().post('/api/check_query/batch', json=QUERIES)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == expected_lines()
+
+
+def test_batch_endpoint_ndjson():
+    body = '\n'.join(json.dumps(q) for q in QUERIES) + '\n{oops\n'
+    response = app.app.test_client().post('/api/check_query/batch', data=body,
+                                          content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[:4] == expected_lines()
+    assert lines[4]['error'].startswith('invalid JSON')
+
+
+def test_batch_endpoint_rejects_other_bodies():
+    response = app.app.test_client().post('/api/check_query/batch', json={'text': 'I have a headache'})
+    assert response.status_code == 400
+
+
+def test_batch_topics_are_counted_in_the_parent_process(monkeypatch):
+    executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+    monkeypatch.setattr(app, '_batch_executor', executor)
+    monkeypatch.setattr(app, 'BATCH_WORKERS', 1)
+    before = app.TOPIC_MATCHES.value('non_medical')
+    try:
+        response = app.app.test_client().post('/api/check_query/batch', json=['what is the capital of France'] * 3)
+        assert len(response.get_data(as_text=True).splitlines()) == 3
+    finally:
+        executor.shutdown()
+    assert app.TOPIC_MATCHES.value('non_medical') == before + 3
+
+
+def test_asgi_batch_endpoint_matches_app():
+    async def post(**kwargs):
+        response = await asgi_app.asgi_app.test_client().post('/api/check_query/batch', **kwargs)
+        return response.status_code, await response.get_data(as_text=True)
+
+    status, body = asyncio.run(post(json=QUERIES))
+    assert status == 200
+    assert [json.loads(line) for line in body.splitlines()] == expected_lines()
+
+    ndjson = '\n'.join(json.dumps(q) for q in QUERIES)
+    status, body = asyncio.run(post(data=ndjson, headers={'Content-Type': 'application/x-ndjson'}))
+    assert [json.loads(line) for line in body.splitlines()] == expected_lines()
+
+    status, _ = asyncio.run(post(json={'text': 'I have a headache'}))
+    assert status == 400
@@ -0,0 +1,73 @@
+"""Tests for the check_query response cache."""
+import pytest
+
+from cache import LRUCache, make_etag, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize('text', [
+    'I have a headache',
+    'i have a headache.',
+    '  I HAVE a headache?! ',
+    'I have\ta headache...',
+])
+def test_normalize_query_folds_case_punctuation_and_spaces(text):
+    assert normalize_query(text) == 'i have a headache'
+
+
+def test_normalize_query_keeps_hyphens_and_apostrophes_inside_words():
+    assert normalize_query("Men's x-ray - results?") == "men's x-ray results"
+    assert normalize_query("'quoted' -dash") == 'quoted dash'
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # now b is the least recently used
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    stats = cache.stats()
+    assert (stats['size'], stats['evictions'], stats['hits'], stats['misses']) == (2, 1, 3, 1)
+
+
+def test_entries_expire_after_the_ttl():
+    clock = FakeClock()
+    cache = LRUCache(maxsize=10, ttl=30, clock=clock)
+    cache.put('a', 1)
+    clock.now = 29.9
+    assert cache.get('a') == 1
+    clock.now = 30
+    assert cache.get('a', 'gone') == 'gone'
+    assert cache.stats()['expirations'] == 1
+    assert cache.stats()['size'] == 0
+
+
+def test_maxsize_zero_caches_nothing():
+    cache = LRUCache(maxsize=0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+
+
+def test_ensure_version_clears_entries_from_another_version():
+    cache = LRUCache()
+    cache.ensure_version('v1')
+    cache.put('a', 1)
+    cache.ensure_version('v1')
+    assert cache.get('a') == 1
+    cache.ensure_version('v2')
+    assert cache.get('a') is None
+    assert cache.stats()['clears'] == 1  # the first version set clears nothing
+
+
+def test_make_etag_is_stable_and_content_dependent():
+    assert make_etag(b'body') == make_etag(b'body') != make_etag(b'other')
+    assert len(make_etag(b'body')) == 32
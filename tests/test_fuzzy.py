@@ -0,0 +1,118 @@
+"""Tests for the spelling-tolerant fuzzy index."""
+import itertools
+import os
+import string
+import time
+
+import pytest
+
+import app
+from fuzzy import FuzzyIndex, edit_distance
+from knowledge import ENGLISH_WORDS_PATH
+
+
+def make_index(**options):
+    return FuzzyIndex(['diabetes', 'migraine', 'asthma', 'heart'], **options)
+
+
+def test_edit_distance():
+    assert edit_distance('diabetis', 'diabetes') == 1
+    assert edit_distance('migrane', 'migraine') == 1
+    assert edit_distance('hte', 'the') == 1
+    assert edit_distance('asma', 'asthma') == 2
+
+
+def test_corrects_misspellings():
+    index = make_index()
+    assert index.correct('I have diabetis') == 'i have diabetes'
+    assert index.correct('Migrane, again!') == 'migraine, again!'
+    # Targets under eight letters allow a single edit, or dropped letters
+    assert index.lookup('astma') == 'asthma'
+    assert index.lookup('asma') == 'asthma'
+    assert index.lookup('azthna') is None
+
+
+def test_leaves_known_and_distant_words_alone():
+    index = make_index(exclude=['diabolical'])
+    text = 'Never mind the diabetes'
+    assert index.correct(text) is text
+    assert index.correct('diabolical') == 'diabolical'
+    # First and last letters must agree
+    assert index.lookup('hear') is None
+
+
+def test_common_words_are_not_corrected():
+    assert FuzzyIndex(['sleep']).correct('count the sheep') == 'count the sleep'
+    index = FuzzyIndex(['sleep'], common_words=['Sheep'])
+    text = 'count the sheep'
+    assert index.correct(text) is text
+
+
+def test_long_tokens_are_skipped_without_a_lookup():
+    index = make_index()
+    calls = []
+    lookup = index._lookup
+    index._lookup = lambda token: calls.append(token) or lookup(token)
+
+    # Deleting two letters from this has millions of distinct results
+    word = string.ascii_lowercase * 200
+    started = time.perf_counter()
+    assert index.correct(f'{word} {word}b diabetis') == f'{word} {word}b diabetes'
+    assert time.perf_counter() - started < 0.5
+    assert calls == ['diabetis']
+    assert index.lookup(word) is None
+    # Too long to be worth remembering
+    assert word not in index._clean
+
+
+def test_lookups_per_query_are_capped():
+    index = make_index(max_lookups=3)
+    calls = []
+    lookup = index._lookup
+    index._lookup = lambda token: calls.append(token) or lookup(token)
+
+    words = [''.join(letters) for letters in itertools.product('xyz', repeat=6)]
+    index.correct(' '.join(words[:100]))
+    assert calls == words[:3]
+
+
+def test_capped_lookups_do_not_depend_on_earlier_queries():
+    index = make_index(max_lookups=3)
+    filler = 'xxxxx yyyyy zzzzz'
+    assert index.correct(f'diabetis {filler}') == f'diabetes {filler}'
+    assert index.correct(f'{filler} diabetis') == f'{filler} diabetis'
+    # Cached verdicts for the filler still count against the cap
+    index.correct(filler)
+    assert index.correct(f'{filler} diabetis') == f'{filler} diabetis'
+
+
+@pytest.mark.skipif(not os.path.exists(ENGLISH_WORDS_PATH),
+                    reason='english_words.txt not built; run python english_words.py')
+@pytest.mark.parametrize('query', [
+    'how is my career going',
+    'count the sheep',
+    'the crown jewels',
+    'I play guitar',
+    'walk on the beach',
+])
+def test_ordinary_words_are_not_medical(query):
+    assert not app.check_query_payload(query)['is_medical']
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('I think I have diabetis', 'diabetes'),
+    ('how do I stop a migrane', 'headache'),
+    ('I have had diarea for three days', 'digestive'),
+])
+def test_misspellings_reach_a_topic(query, expected):
+    assert app.find_medical_topic(query)['name'] == expected
+    assert app.check_query_payload(query)['response']
+
+
+@pytest.mark.parametrize('misspelled, query', [
+    ('I feel dizy', 'I feel dizzy'),
+    ('does artritis run in families', 'does arthritis run in families'),
+    ('my asma gets worse at night', 'my asthma gets worse at night'),
+])
+def test_misspelled_keywords_classify_like_the_word(misspelled, query):
+    assert app.check_query_payload(misspelled) == app.check_query_payload(query)
@@ -0,0 +1,48 @@
+"""
+Golden test for generate_medical_response.
+
+golden/generate_medical_response.json was recorded from the original
+if/elif generate_medical_response (the baseline commit) over
+benchmarks/queries.txt plus a few compound-word queries: each query with
+the label of the response it returned, and each response text. The topic
+index and knowledge.json must give the same answers, apart from the
+deliberate differences listed in CHANGED.
+"""
+import json
+import os
+
+import pytest
+
+import app
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden', 'generate_medical_response.json')
+
+with open(GOLDEN_PATH, encoding='utf-8') as f:
+    GOLDEN = json.load(f)
+
+# Queries the baseline answered because a term matched inside another word,
+# or missed because a form of a term was not spelled like it -> the answer
+# now given instead
+CHANGED = {
+    'acid reflux at night': 'digestive',            # "flu" in "reflux"
+    'dementia in my grandmother': 'neurological',   # "tia" in "dementia"
+    'OCD symptoms': 'mental_health',                # "ms" in "symptoms"
+    'menopause symptoms': 'womens_health',          # "ms" in "symptoms"
+    'toddler tantrums': 'childrens_health',         # "ms" in "tantrums"
+    'covid symptoms': 'infectious_disease',         # "ms" in "symptoms"
+    'what is the weather today': None,              # "eat" in "weather"
+    'heartbeat irregular': None,                    # "eat" in "heartbeat"
+    'list the items in my cart': None,              # "ms" in "items"
+    'I keep sneezing': 'respiratory',               # "sneeze" is not in "sneezing"
+}
+
+
+@pytest.mark.parametrize('query, label', GOLDEN['queries'])
+def test_matches_baseline(query, label):
+    label = CHANGED.get(query, label)
+    expected = GOLDEN['responses'][label] if label is not None else None
+    assert app.generate_medical_response(query) == expected
+
+
+def test_changes_are_still_in_the_corpus():
+    assert set(CHANGED) <= {query for query, _ in GOLDEN['queries']}
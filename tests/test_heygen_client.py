@@ -0,0 +1,141 @@
+"""Tests for the Heygen client against the local stub in benchmarks/heygen_stub.py."""
+import asyncio
+import socket
+
+import httpx
+import pytest
+import requests
+
+import app
+from heygen_client import AsyncHeygenClient, CircuitBreaker, CircuitOpenError, HeygenClient, RetryBudget
+from heygen_stub import HeygenStub
+
+CREATE_TOKEN_PATH = '/v1/streaming.create_token'
+AVATARS_PATH = '/v2/avatars'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def stub():
+    server = HeygenStub(('127.0.0.1', 0)).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(base_url, **options):
+    options.setdefault('backoff', 0)
+    options.setdefault('max_retries', 2)
+    return HeygenClient('test', base_url, **options)
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def test_get_retries_5xx_until_the_budget_is_spent(stub):
+    stub.error_rate = 1.0
+    client = make_client(stub.base_url, max_retries=5, retry_budget=RetryBudget(ratio=0, initial=2))
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.list_avatars()
+    assert stub.calls[AVATARS_PATH] == 3
+    assert client.stats()['calls']['avatars']['retries'] == 2
+    assert client.retry_budget.balance < 1
+
+
+def test_post_is_not_retried_after_a_5xx(stub):
+    stub.error_rate = 1.0
+    client = make_client(stub.base_url)
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.create_streaming_token()
+    assert stub.calls[CREATE_TOKEN_PATH] == 1
+
+
+def test_post_is_retried_when_the_connect_fails():
+    client = make_client(closed_port_url())
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.create_streaming_token()
+    assert client.stats()['calls']['streaming.create_token']['retries'] == 2
+
+
+def test_async_post_is_only_retried_when_the_connect_fails(stub):
+    async def create_token(base_url):
+        """Return (client, error) for one failing create_token call."""
+        client = AsyncHeygenClient('test', base_url, backoff=0, max_retries=2)
+        try:
+            await client.create_streaming_token()
+        except httpx.HTTPError as e:
+            return client, e
+        finally:
+            await client.aclose()
+        raise AssertionError("create_token succeeded")
+
+    stub.error_rate = 1.0
+    client, error = asyncio.run(create_token(stub.base_url))
+    assert isinstance(error, httpx.HTTPStatusError)
+    assert stub.calls[CREATE_TOKEN_PATH] == 1
+    client, error = asyncio.run(create_token(closed_port_url()))
+    assert isinstance(error, httpx.ConnectError)
+    assert client.stats()['calls']['streaming.create_token']['retries'] == 2
+
+
+def test_read_timeout(stub):
+    stub.latency = 0.3
+    client = make_client(stub.base_url, read_timeout=0.05)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.create_streaming_token()
+    # Heygen may have minted the token already, so the POST is not resent
+    assert stub.calls[CREATE_TOKEN_PATH] == 1
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.list_avatars()
+    assert stub.calls[AVATARS_PATH] == 3
+
+
+def test_breaker_opens_and_recovers_through_half_open(stub):
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    client = make_client(stub.base_url, breaker=breaker)
+    stub.error_rate = 1.0
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.create_streaming_token()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Open: fail fast without calling Heygen
+    with pytest.raises(CircuitOpenError):
+        client.create_streaming_token()
+    assert stub.calls[CREATE_TOKEN_PATH] == 2
+    assert client.stats()['circuit_rejected'] == 1
+
+    # Half-open: one trial call; a failure opens the circuit again
+    clock.now = 10
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.create_streaming_token()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        client.create_streaming_token()
+
+    # A successful trial closes it
+    clock.now = 20
+    stub.error_rate = 0.0
+    assert client.create_streaming_token()['data']['token']
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert stub.calls[CREATE_TOKEN_PATH] == 4
+
+
+def test_open_circuit_is_a_500_from_create_token(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    monkeypatch.setattr(app.HEYGEN_CLIENT, 'breaker', breaker)
+    response = app.app.test_client().post('/api/create_token')
+    assert response.status_code == 500
+    assert 'circuit breaker is open' in response.get_json()['error']
@@ -0,0 +1,112 @@
+"""Tests for loading and hot-reloading the knowledge file."""
+import json
+import os
+
+import pytest
+
+from knowledge import KnowledgeBase, read_knowledge
+
+KNOWLEDGE = {
+    'keywords': {'symptoms': ['headache', 'fever']},
+    'topics': [
+        {'name': 'headache', 'terms': ['headache'], 'response': 'Rest and drink water.'},
+        {'name': 'fever', 'terms': ['fever'], 'response': 'Check your temperature.'},
+    ],
+    'non_medical_response': 'I can only answer health questions.',
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def write(path, data, mtime):
+    path.write_text(data if isinstance(data, str) else json.dumps(data))
+    # Set the mtime explicitly: writes within one clock tick can share it
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def knowledge_file(tmp_path):
+    path = tmp_path / 'knowledge.json'
+    write(path, KNOWLEDGE, 1)
+    return path
+
+
+def with_topic(**topic):
+    return dict(KNOWLEDGE, topics=[dict(KNOWLEDGE['topics'][0], **topic)])
+
+
+@pytest.mark.parametrize('data', [
+    with_topic(terms=[None]),
+    with_topic(terms=['']),
+    with_topic(terms='headache'),
+    with_topic(subtopics={'name': 'migraine'}),
+    with_topic(subtopics=[{'name': 'migraine', 'terms': [3], 'response': 'Lie down.'}]),
+    dict(KNOWLEDGE, keywords=['headache', None]),
+    dict(KNOWLEDGE, forms={'cough': [None]}),
+    dict(KNOWLEDGE, fuzzy_excluded_words='career'),
+])
+def test_malformed_files_are_rejected(tmp_path, data):
+    path = tmp_path / 'knowledge.json'
+    write(path, data, 1)
+    with pytest.raises(ValueError):
+        read_knowledge(path)
+
+
+def test_reload_swaps_in_a_changed_file(knowledge_file):
+    clock = FakeClock()
+    base = KnowledgeBase(knowledge_file, reload_interval=5, clock=clock)
+    before = base.current()
+    assert base.current().topic_index.lookup('I have a fever')['name'] == 'fever'
+
+    changed = dict(KNOWLEDGE, topics=[dict(KNOWLEDGE['topics'][1], response='See a doctor.')])
+    write(knowledge_file, changed, 2)
+    assert base.current() is before  # not checked again until the interval is up
+    clock.now = 5
+    after = base.current()
+    assert after is not before and after.version != before.version
+    assert after.topic_index.lookup('I have a fever')['response'] == 'See a doctor.'
+    assert before.topic_index.lookup('I have a fever')['response'] == 'Check your temperature.'
+    assert (base.reloads, base.reload_errors) == (1, 0)
+
+
+@pytest.mark.parametrize('content', [
+    '{"keywords": ["headache"], "topics": [',
+    json.dumps(with_topic(terms=[None])),
+    json.dumps(with_topic(subtopics='migraine')),
+])
+def test_broken_file_keeps_the_old_snapshot(knowledge_file, content):
+    clock = FakeClock()
+    base = KnowledgeBase(knowledge_file, reload_interval=5, clock=clock)
+    before = base.current()
+
+    write(knowledge_file, content, 2)
+    for now in (5, 10):
+        clock.now = now
+        assert base.current() is before
+    assert (base.reloads, base.reload_errors) == (0, 1)  # each broken version is reported once
+
+    write(knowledge_file, KNOWLEDGE, 3)
+    clock.now = 15
+    assert base.current() is before  # same content as before, nothing to swap
+    assert base.maybe_reload(force=True) is False
+
+
+def test_compile_errors_keep_the_old_snapshot(knowledge_file, monkeypatch):
+    clock = FakeClock()
+    base = KnowledgeBase(knowledge_file, reload_interval=5, clock=clock)
+    before = base.current()
+
+    def fail(data):
+        raise AttributeError("'NoneType' object has no attribute 'lower'")
+
+    monkeypatch.setattr(base, '_compile', fail)
+    write(knowledge_file, with_topic(response='Lie down.'), 2)
+    clock.now = 5
+    assert base.current() is before
+    assert base.reload_errors == 1
@@ -0,0 +1,120 @@
+"""Tests for the keyword matcher and the medical query classifier."""
+import pytest
+
+from knowledge import compile_knowledge, read_knowledge
+from matcher import KeywordMatcher, TopicIndex, derived_forms
+
+
+@pytest.fixture(scope='module')
+def knowledge():
+    return compile_knowledge(read_knowledge())
+
+
+def topic_name(knowledge, query):
+    topic = knowledge.topic_index.lookup(query)
+    return topic['name'] if topic else None
+
+
+def test_whole_words_only():
+    matcher = KeywordMatcher(['ear', 'flu'])
+    assert matcher.matches('my ear hurts')
+    assert not matcher.matches('what year is it')
+    assert not matcher.matches('acid reflux')
+
+
+def test_inflections():
+    matcher = KeywordMatcher(['headache', 'fever', 'child', 'rash'],
+                             forms={'fever': ['feverish'], 'child': ['children'], 'flu': ['flus']})
+    assert [m.keyword for m in matcher.find_all('Headaches, feverish children, rashes')] == [
+        'headache', 'fever', 'child', 'rash']
+    # Forms of words that are not keywords are ignored
+    assert not matcher.matches('flus')
+
+
+def test_no_suffix_makes_another_word():
+    matcher = KeywordMatcher(['arm', 'heart', 'hand', 'head', 'foot', 'cold'])
+    for text in ('the army', 'a hearty meal', 'handy', 'page header', 'footer', 'colder', 'heading home'):
+        assert not matcher.matches(text), text
+
+
+def test_compounds_report_both_halves():
+    matcher = KeywordMatcher(['tooth', 'pain'])
+    match = matcher.search('a toothache')
+    assert (match.keyword, match.compound) == ('tooth', 'ache')
+    assert matcher.find_all('painkillers')[0].compound == 'killer'
+    assert not matcher.matches('a mustache')
+
+
+def test_derived_forms():
+    assert derived_forms('diabetes') == ('diabetic',)
+    assert derived_forms('asthma') == ('asthmatic',)
+    assert derived_forms('allergy') == ('allergic',)
+    assert derived_forms('arthritis') == ('arthritic',)
+    assert derived_forms('epilepsy') == ('epileptic',)
+    assert derived_forms('anemia') == ('anemic',)
+    assert derived_forms('flu') == ()
+    matcher = KeywordMatcher(['diabetes'])
+    assert [m.keyword for m in matcher.find_all('two diabetics')] == ['diabetes']
+
+
+def test_vocabulary_words_answer_nothing_alone():
+    index = TopicIndex([{'name': 'pain', 'terms': ['ache'], 'response': 'pain'}], vocabulary=['tooth'])
+    assert index.lookup('my tooth') is None
+    assert index.lookup('toothache')['name'] == 'pain'
+    assert index.matcher.matches('my tooth')
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('heartburn after dinner', 'digestive'),
+    ('I get indigestion after meals', 'digestive'),
+    ('allergic reaction', 'allergies'),
+    ('erectile dysfunction', 'mens_health'),
+    ('lethargy and weakness', 'fatigue'),
+    ('I am underweight', 'nutrition'),
+    ('physical activity guidelines', 'exercise'),
+    ('I have a stomachache', 'digestive'),
+    ('toothache', 'pain'),
+    ('backache', 'back_pain'),
+    ('earache', 'pain'),
+    ('bellyache', 'abdominal_pain'),
+    ('I feel feverish', 'fever'),
+    ('painkillers', 'pain'),
+    ('I am diabetic', 'diabetes'),
+    ('asthmatic child', 'respiratory_disease'),
+    # Compounds whose first half is no keyword, listed as forms
+    ('I have a sunburn', 'first_aid'),
+    ('breastfeeding tips', 'womens_health'),
+    ('my son has a nosebleed', None),
+    ('heartbeat irregular', None),
+    ('bloodwork results', None),
+    ('the eyelid is swollen', None),
+])
+def test_topic_terms_and_their_forms_are_medical(knowledge, query, expected):
+    assert knowledge.matcher.matches(query)
+    assert topic_name(knowledge, query) == expected
+
+
+@pytest.mark.parametrize('query', [
+    'what year is it',
+    'list the items in my cart',
+    'I like this song',
+    # Topic terms that are ordinary words
+    "it's hot today",
+    'what period of history is this',
+    "I'm a senior developer",
+    'the operation completed successfully',
+    'cosmic radiation in space',
+    'the procedure for filing taxes',
+    'I had so much energy today',
+    'what food should I order',
+    'toddler tantrums',
+    # Keywords plus a suffix that makes another word
+    'join the army',
+    'a hearty breakfast',
+    'that is handy',
+    'the page header',
+    "it's colder than yesterday",
+    'heading home now',
+])
+def test_non_medical(knowledge, query):
+    assert not knowledge.matcher.matches(query)
@@ -0,0 +1,84 @@
+"""Tests for rendering metrics in the Prometheus text format."""
+import app
+from metrics import Registry
+
+
+def test_counter_render():
+    registry = Registry()
+    counter = registry.counter('topics_total', 'Answers by topic.', ('topic',))
+    counter.inc('headache')
+    counter.inc('headache')
+    counter.inc('fever', amount=3)
+    assert counter.value('headache') == 2
+    assert registry.render() == (
+        '# HELP topics_total Answers by topic.\n'
+        '# TYPE topics_total counter\n'
+        'topics_total{topic="fever"} 3\n'
+        'topics_total{topic="headache"} 2\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.histogram('latency_seconds', 'Latency.', ('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, '/a')
+    assert histogram.count('/a') == 4
+    assert registry.render().splitlines() == [
+        '# HELP latency_seconds Latency.',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',  # a value on a bound falls in its bucket
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 2.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_unlabelled_histogram_and_timer():
+    registry = Registry()
+    histogram = registry.histogram('work_seconds', 'Work.', buckets=(10.0,))
+    with histogram.time():
+        pass
+    lines = registry.render().splitlines()
+    assert lines[2:4] == ['work_seconds_bucket{le="10"} 1', 'work_seconds_bucket{le="+Inf"} 1']
+    assert lines[-1] == 'work_seconds_count 1'
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    counter = registry.counter('queries_total', 'Queries.', ('text',))
+    counter.inc('say "hi"\\n\nnow')
+    assert registry.render().splitlines()[-1] == r'queries_total{text="say \"hi\"\\n\nnow"} 1'
+
+
+def test_collector_gauges():
+    registry = Registry()
+
+    @registry.add_collector
+    def collect():
+        yield 'pool_available', 'Pooled tokens.', {}, 2
+        yield 'admitted', 'Admitted requests.', {'route': 'a'}, 1.0
+        yield 'admitted', 'Admitted requests.', {'route': 'b'}, 0.5
+
+    assert registry.render() == (
+        '# HELP pool_available Pooled tokens.\n'
+        '# TYPE pool_available gauge\n'
+        'pool_available 2\n'
+        '# HELP admitted Admitted requests.\n'
+        '# TYPE admitted gauge\n'
+        'admitted{route="a"} 1\n'
+        'admitted{route="b"} 0.5\n'
+    )
+
+
+def test_metrics_endpoint():
+    client = app.app.test_client()
+    client.post('/api/check_query', json={'text': 'I have a headache'})
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert '# TYPE medimate_request_seconds histogram' in body
+    assert 'medimate_request_seconds_count{route="/api/check_query",method="POST",status="200"}' in body
+    assert 'medimate_topic_matches_total{topic="headache"}' in body
@@ -0,0 +1,33 @@
+"""Tests for opt-in request profiling."""
+import os
+
+import app
+from profiler import profile_requested, save_profile
+
+
+def test_profile_requested_needs_the_token():
+    assert profile_requested('s3cret', 's3cret')
+    assert not profile_requested('1', 's3cret')
+    assert not profile_requested(None, 's3cret')
+    assert not profile_requested('', '')
+    assert not profile_requested('1', '')
+
+
+def test_save_profile_keeps_the_newest_files(tmp_path):
+    names = [save_profile(str(tmp_path), '/api/check_query', f'main {i}\n', max_files=3) for i in range(5)]
+    assert sorted(os.listdir(tmp_path)) == sorted(names[-3:])
+    assert all(os.sep not in name for name in names)
+
+
+def test_only_requests_with_the_token_are_profiled(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'PROFILE_TOKEN', 's3cret')
+    monkeypatch.setattr(app, 'PROFILE_DIR', str(tmp_path))
+    client = app.app.test_client()
+
+    response = client.get('/api/config', headers={'X-Profile': '1'})
+    assert 'X-Profile-Id' not in response.headers
+    assert os.listdir(tmp_path) == []
+
+    response = client.get('/api/config', headers={'X-Profile': 's3cret'})
+    assert os.listdir(tmp_path) == [response.headers['X-Profile-Id']]
+    assert 'X-Profile-File' not in response.headers
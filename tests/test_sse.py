@@ -0,0 +1,73 @@
+"""Tests for streaming check_query answers as Server-Sent Events."""
+import json
+import time
+
+import pytest
+
+import app
+from sse import answer_events, format_event, split_sentences
+
+
+def parse_events(body):
+    """Return [(event, data)] from an SSE body."""
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_split_sentences():
+    assert split_sentences('Rest well. Drink water! Is it bad? "Maybe" not.') == (
+        'Rest well.', 'Drink water!', 'Is it bad?', '"Maybe" not.')
+    assert split_sentences('Above 100.4°F (38°C) is a fever.') == ('Above 100.4°F (38°C) is a fever.',)
+    assert split_sentences('') == ()
+
+
+def test_format_event():
+    assert format_event('chunk', {'index': 0}) == 'event: chunk\ndata: {"index": 0}\n\n'
+
+
+def test_answer_events():
+    payload = {'is_medical': True, 'response': 'One. Two.'}
+    assert parse_events(''.join(answer_events(payload))) == [
+        ('chunk', {'index': 0, 'text': 'One.'}),
+        ('chunk', {'index': 1, 'text': 'Two.'}),
+        ('done', {'is_medical': True, 'response': 'One. Two.', 'chunks': 2}),
+    ]
+
+
+@pytest.mark.parametrize('query', ['I have a headache', 'what is the capital of France', 'my knee hurts'])
+def test_stream_reassembles_into_the_check_query_answer(query):
+    client = app.app.test_client()
+    expected = client.post('/api/check_query', json={'text': query}).get_json()
+    response = client.post('/api/check_query/stream', json={'text': query})
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    events = parse_events(response.get_data(as_text=True))
+    chunks = [data['text'] for event, data in events if event == 'chunk']
+    assert ' '.join(chunks) == expected['response']
+    assert events[-1] == ('done', dict(expected, chunks=len(chunks)))
+
+
+def test_first_chunk_is_sent_before_the_rest_of_the_answer(monkeypatch):
+    # Hold back every event after the first, as a slow connection or a long
+    # answer would; the first chunk must not wait for them
+    def slow_events(payload):
+        for i, event in enumerate(answer_events(payload)):
+            if i:
+                time.sleep(0.2)
+            yield event
+
+    monkeypatch.setattr(app, 'answer_events', slow_events)
+    client = app.app.test_client()
+    started = time.perf_counter()
+    response = client.post('/api/check_query/stream', json={'text': 'I have a headache'}, buffered=False)
+    assert response.headers['X-Accel-Buffering'] == 'no'
+    first = next(iter(response.response))
+    time_to_first_chunk = time.perf_counter() - started
+    response.close()
+
+    event, data = parse_events(first.decode())[0]
+    assert event == 'chunk' and data['index'] == 0 and data['text']
+    assert time_to_first_chunk < 0.2
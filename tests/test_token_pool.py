@@ -0,0 +1,158 @@
+"""Tests for the background-refilled Heygen token pool."""
+import threading
+import time
+
+import pytest
+
+from heygen_client import HeygenClient
+from heygen_stub import HeygenStub
+from token_pool import TokenPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingMint:
+    """Returns {'token': 1}, {'token': 2}, ...; blocks while gate is clear."""
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        self.gate.wait(5)
+        with self._lock:
+            self.calls += 1
+            return {'token': self.calls}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def pools():
+    started = []
+
+    def make(*args, **kwargs):
+        pool = TokenPool(*args, **kwargs)
+        started.append(pool)
+        return pool
+
+    yield make
+    for pool in started:
+        pool.stop(timeout=5)
+
+
+def test_hits_are_refilled_and_each_token_is_handed_out_once(pools):
+    mint = CountingMint()
+    pool = pools(mint, size=2, clock=FakeClock())
+    pool.start()
+    wait_for(lambda: pool.stats()['available'] == 2)
+
+    assert pool.acquire() == {'token': 1}
+    assert pool.try_acquire() == {'token': 2}
+    wait_for(lambda: pool.stats()['available'] == 2)
+    assert pool.acquire() == {'token': 3}
+    wait_for(lambda: pool.stats()['available'] == 2)
+
+    stats = pool.stats()
+    assert (stats['hits'], stats['misses'], stats['refills']) == (3, 0, 5)
+    assert stats['hit_rate'] == 1.0
+    assert stats['mint_latency_max_ms'] >= stats['mint_latency_avg_ms'] > 0
+
+
+def test_tokens_inside_the_refresh_margin_are_discarded(pools):
+    clock = FakeClock()
+    mint = CountingMint()
+    pool = pools(mint, size=1, ttl=600, refresh_margin=60, clock=clock)
+    pool.start()
+    wait_for(lambda: pool.stats()['available'] == 1)
+
+    clock.now = 539  # still a minute and a second to go
+    assert pool.stats()['available'] == 1
+    mint.gate.clear()
+    clock.now = 540
+    assert pool.try_acquire() is None  # token 1 is stale and never handed out
+    assert pool.stats()['misses'] == 1
+
+    mint.gate.set()
+    wait_for(lambda: pool.stats()['available'] == 1)
+    assert pool.try_acquire() == {'token': 2}
+
+
+def test_concurrent_misses_share_one_mint(pools):
+    mint = CountingMint()
+    mint.gate.clear()
+    pool = pools(mint, size=0)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.acquire())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: pool.stats()['misses'] == 4)
+    mint.gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [{'token': 1}] * 4
+    assert mint.calls == 1
+    stats = pool.stats()
+    assert (stats['misses'], stats['shared_misses'], stats['hits']) == (4, 3, 0)
+
+    assert pool.acquire() == {'token': 2}  # the next miss mints afresh
+
+
+def test_mint_errors_reach_every_waiter(pools):
+    gate = threading.Event()
+
+    def failing_mint():
+        gate.wait(5)
+        raise RuntimeError('upstream down')
+
+    pool = pools(failing_mint, size=0)
+    errors = []
+
+    def acquire():
+        try:
+            pool.acquire()
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=acquire) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: pool.stats()['misses'] == 3)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert [str(e) for e in errors] == ['upstream down'] * 3
+
+
+def test_refill_against_the_heygen_stub(pools):
+    stub = HeygenStub(('127.0.0.1', 0), latency=0.1).start()
+    try:
+        client = HeygenClient('test', stub.base_url)
+        pool = pools(client.create_streaming_token, size=2)
+        pool.start()
+        wait_for(lambda: pool.stats()['available'] == 2)
+
+        tokens = {pool.acquire()['data']['token'] for _ in range(3)}
+        assert len(tokens) == 3  # two pooled, one minted on the miss
+        wait_for(lambda: pool.stats()['available'] == 2)
+        stats = pool.stats()
+        assert (stats['hits'], stats['misses']) == (2, 1)
+        assert stub.calls['/v1/streaming.create_token'] == stats['refills'] + 1
+        assert stats['mint_latency_avg_ms'] >= 10
+    finally:
+        stub.shutdown()
+        stub.server_close()
@@ -0,0 +1,214 @@
+"""
+Heygen streaming token pool for MediMate.
+Keeps a few session tokens minted ahead of time so /api/create_token can
+answer without waiting on a Heygen round trip.
+"""
+import threading
+import time
+from collections import deque
+
+
+class _PendingMint:
+    """A mint in progress that concurrent misses wait on instead of repeating."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class TokenPool:
+    """A background-refilled pool of Heygen streaming tokens.
+
+    mint is a callable returning the Heygen create_token payload. Each pooled
+    token is handed out once and is discarded refresh_margin seconds before
+    its ttl runs out, so callers never get a token that is about to expire.
+    Tokens minted on a miss are not pooled: callers that miss while a mint
+    is in flight all get its token, so one token may start several sessions.
+    """
+
+    def __init__(self, mint, size=2, ttl=600, refresh_margin=60, clock=time.monotonic):
+        self.mint = mint
+        self.size = size
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+
+        self._tokens = deque()  # (payload, expires_at), oldest first
+        self._lock = threading.Lock()
+        self._pending = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._hits = 0
+        self._misses = 0
+        self._shared_misses = 0
+        self._refills = 0
+        self._refill_errors = 0
+        self._mint_count = 0
+        self._mint_total = 0.0
+        self._mint_max = 0.0
+        self._mint_last = 0.0
+
+    def start(self):
+        """Start the background refill thread (idempotent)."""
+        with self._lock:
+            if self.size <= 0 or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._refill_loop, name='heygen-token-pool', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the refill thread and drop any pooled tokens."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._lock:
+            self._thread = None
+            self._tokens.clear()
+
+    def acquire(self, admit=None):
+        """Return a token payload, minting one on demand if the pool is empty.
+
+        Concurrent callers that miss share a single upstream call and all
+        return the token it mints. Errors from mint propagate to every caller
+        waiting on it. admit, if given, is a
+        context manager factory entered only on a miss, around waiting for
+        the mint (an admission slot, say); pool hits never touch it.
+        """
+        self.start()
+        with self._lock:
+            payload = self._take()
+            if payload is not None:
+                return payload
+        if admit is None:
+            return self._acquire_minted()
+        with admit():
+            return self._acquire_minted()
+
+    def _acquire_minted(self):
+        with self._lock:
+            # A refill may have landed while the caller waited to be admitted
+            payload = self._take()
+            if payload is not None:
+                return payload
+            self._misses += 1
+            pending = self._pending
+            leader = pending is None
+            if leader:
+                pending = self._pending = _PendingMint()
+            else:
+                self._shared_misses += 1
+
+        if leader:
+            try:
+                pending.result = self._timed_mint()
+            except Exception as e:
+                pending.error = e
+            finally:
+                with self._lock:
+                    self._pending = None
+                pending.done.set()
+            self._wake.set()
+        else:
+            pending.done.wait()
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def try_acquire(self):
+        """Return a pooled token payload, or None if the pool is empty.
+
+        Never calls Heygen; a None result counts as a miss and the caller is
+        expected to mint the token itself.
+        """
+        self.start()
+        with self._lock:
+            payload = self._take()
+            if payload is None:
+                self._misses += 1
+            return payload
+
+    def stats(self):
+        """Return pool counters and refill latency as a plain dict."""
+        with self._lock:
+            requests = self._hits + self._misses
+            return {
+                'size': self.size,
+                'available': len(self._tokens),
+                'hits': self._hits,
+                'misses': self._misses,
+                'shared_misses': self._shared_misses,
+                'hit_rate': self._hits / requests if requests else 0.0,
+                'refills': self._refills,
+                'refill_errors': self._refill_errors,
+                'mint_latency_avg_ms': self._mint_total / self._mint_count * 1000 if self._mint_count else 0.0,
+                'mint_latency_max_ms': self._mint_max * 1000,
+                'mint_latency_last_ms': self._mint_last * 1000,
+            }
+
+    def _timed_mint(self):
+        started = time.perf_counter()
+        try:
+            return self.mint()
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._mint_count += 1
+                self._mint_total += elapsed
+                self._mint_max = max(self._mint_max, elapsed)
+                self._mint_last = elapsed
+
+    def _take(self):
+        """Pop the oldest fresh token, or return None. Caller holds the lock."""
+        self._discard_stale()
+        if not self._tokens:
+            return None
+        self._hits += 1
+        payload, _ = self._tokens.popleft()
+        self._wake.set()
+        return payload
+
+    def _discard_stale(self):
+        """Drop tokens inside the refresh margin. Caller holds the lock."""
+        cutoff = self.clock() + self.refresh_margin
+        while self._tokens and self._tokens[0][1] <= cutoff:
+            self._tokens.popleft()
+            self._wake.set()
+
+    def _refill_loop(self):
+        failures = 0
+        while not self._stop.is_set():
+            # Clear before looking at the pool so a take that races with the
+            # check below still wakes the next wait
+            self._wake.clear()
+            with self._lock:
+                self._discard_stale()
+                missing = self.size - len(self._tokens)
+                next_stale = self._tokens[0][1] - self.refresh_margin if self._tokens else None
+
+            if missing <= 0:
+                # Sleep until the oldest token goes stale or a caller takes one
+                timeout = None if next_stale is None else max(0.0, next_stale - self.clock())
+                self._wake.wait(timeout)
+                continue
+
+            issued_at = self.clock()
+            try:
+                payload = self._timed_mint()
+            except Exception:
+                failures += 1
+                with self._lock:
+                    self._refill_errors += 1
+                # Back off so a degraded upstream is not hammered
+                self._stop.wait(min(30.0, 0.5 * 2 ** failures))
+                continue
+
+            failures = 0
+            with self._lock:
+                self._tokens.append((payload, issued_at + self.ttl))
+                self._refills += 1